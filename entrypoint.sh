@@ -22,10 +22,11 @@ mkdir -p /tmp/workspaces
 mkdir -p /tmp/sbt-cache
 mkdir -p /tmp/ivy-cache
 mkdir -p /tmp/coursier-cache
+mkdir -p /tmp/sbt-remote-cache
 mkdir -p /tmp/search_index
 
 # Set permissions
-chmod 755 /tmp/workspaces /tmp/sbt-cache /tmp/ivy-cache /tmp/coursier-cache /tmp/search_index
+chmod 755 /tmp/workspaces /tmp/sbt-cache /tmp/ivy-cache /tmp/coursier-cache /tmp/sbt-remote-cache /tmp/search_index
 
 echo "Directories created and permissions set."
 
@@ -56,7 +56,7 @@ class BashSession:
                 "-v", f"{self.workspace_path}:/workspace",
                 "-v", "/tmp/sbt-cache:/root/.sbt",
                 "-v", "/tmp/ivy-cache:/root/.ivy2", 
-                "-v", "/tmp/coursier-cache:/root/.cache/coursier",
+                "-v", f"{os.getenv('SCALA_RUNNER_COURSIER_DIR', '/tmp/coursier-cache')}:/root/.cache/coursier",
                 "-w", "/workspace",
                 # Add JVM options for stability and ARM compatibility
                 "-e", "JAVA_OPTS=-Xmx2g -Xms512m -XX:+UseG1GC -XX:+UnlockExperimentalVMOptions -XX:+UseContainerSupport",
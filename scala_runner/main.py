@@ -4,7 +4,7 @@ import tempfile
 import asyncio
 import json
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, field_validator
 from dotenv import load_dotenv
 from typing import List, Optional, Dict, Any
@@ -19,6 +19,13 @@ from .workspace_manager import WorkspaceManager
 from .sbt_runner import SBTRunner
 from .bash_session_manager import BashSessionManager
 
+# orjson is optional; fall back to the stdlib encoder when it is not installed
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 # Import all routers
 from .routers import (
     workspace_router,
@@ -78,19 +85,24 @@ async def lifespan(app: FastAPI):
     # Close any remaining sessions
     cleanup_result = await bash_session_manager.cleanup_inactive_sessions()
     logger.info(f"Application shutdown: Cleaned up {cleanup_result.get('cleaned_sessions', 0)} sessions")
+    
+    # Stop persistent sbt server containers
+    stopped = await sbt_runner.stop_all_servers()
+    logger.info(f"Application shutdown: Stopped {stopped} sbt server containers")
 
 app = FastAPI(
     title="Scala SBT Workspace API",
     description="Manage SBT workspaces and run SBT commands via Docker",
     version="0.2.0",
     lifespan=lifespan,
+    default_response_class=DefaultResponse,
 )
 # register the exception handler
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Initialize managers in routers
-workspace.set_managers(workspace_manager)
+workspace.set_managers(workspace_manager, sbt_runner)
 git.set_managers(workspace_manager)
 files.set_managers(workspace_manager)
 search.set_managers(workspace_manager)
@@ -5,6 +5,7 @@ File management endpoints.
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, field_validator
+from typing import List
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import logging
@@ -49,6 +50,22 @@ class UpdateFileRequest(BaseModel):
     content: str
 
 
+class FileContent(BaseModel):
+    file_path: str
+    content: str
+
+
+class BatchUpdateFilesRequest(BaseModel):
+    workspace_name: str
+    files: List[FileContent]
+    
+    @field_validator("files")
+    def validate_files(cls, v: List[FileContent]) -> List[FileContent]:
+        if not v:
+            raise ValueError("files cannot be empty")
+        return v
+
+
 class PatchFileRequest(BaseModel):
     workspace_name: str
     patch: str
@@ -97,6 +114,23 @@ async def update_file(request: Request, payload: UpdateFileRequest):
         raise HTTPException(500, f"Internal server error: {str(e)}")
 
 
+@router.put("/batch", summary="Create or update several files at once")
+@limiter.limit(RATE_LIMIT)
+async def update_files_batch(request: Request, payload: BatchUpdateFilesRequest):
+    """Create or update several files in a workspace with one request"""
+    try:
+        result = await workspace_manager.update_files(
+            payload.workspace_name,
+            [f.model_dump() for f in payload.files]
+        )
+        return JSONResponse({"status": "success", "data": result})
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    except Exception as e:
+        logger.error(f"Error updating files: {e}")
+        raise HTTPException(500, f"Internal server error: {str(e)}")
+
+
 @router.patch("", summary="Apply git diff patch to files")
 @limiter.limit(RATE_LIMIT)
 async def patch_files(request: Request, payload: PatchFileRequest):
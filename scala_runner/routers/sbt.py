@@ -3,7 +3,7 @@ SBT command endpoints.
 """
 
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from slowapi import Limiter
@@ -149,6 +149,42 @@ async def clean_project(request: Request, payload: dict):
         raise HTTPException(500, f"Internal server error: {str(e)}")
 
 
+async def _stream_sbt(workspace_name: str, command: str, timeout: Optional[int] = None):
+    """Start an SBT command and stream its output as plain text"""
+    try:
+        workspace_path = workspace_manager.get_workspace_path(workspace_name)
+        if not workspace_path.exists():
+            raise HTTPException(404, f"Workspace '{workspace_name}' not found")
+        
+        lines = await sbt_runner.stream_sbt_command(workspace_path, command, timeout)
+        return StreamingResponse(lines, media_type="text/plain")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except Exception as e:
+        logger.error(f"Error streaming SBT command: {e}")
+        raise HTTPException(500, f"Internal server error: {str(e)}")
+
+
+@router.post("/run/stream", summary="Run SBT command, streaming output")
+@limiter.limit(RATE_LIMIT)
+async def stream_sbt_command(request: Request, payload: SBTCommandRequest):
+    """Execute an SBT command and stream its output line by line.
+    
+    The body ends with an "[exit] <code>" (or "[timeout] ...") line; a client
+    that disconnects early stops the command.
+    """
+    return await _stream_sbt(payload.workspace_name, payload.command, payload.timeout)
+
+
+@router.post("/compile/stream", summary="Compile SBT project, streaming output")
+@limiter.limit(RATE_LIMIT)
+async def stream_compile_project(request: Request, payload: SBTProjectRequest):
+    """Compile the SBT project and stream the compiler output"""
+    return await _stream_sbt(payload.workspace_name, "compile", payload.timeout)
+
+
 @router.get("/project-info/{workspace_name}", summary="Get SBT project info")
 @limiter.limit(RATE_LIMIT)
 async def get_project_info(request: Request, workspace_name: str):
@@ -30,11 +30,13 @@ router = APIRouter(
 
 # Import managers - these will be injected via dependency injection
 workspace_manager = None
+sbt_runner = None
 
-def set_managers(ws_manager):
-    """Set the workspace manager instance"""
-    global workspace_manager
+def set_managers(ws_manager, sbt_r=None):
+    """Set the manager instances"""
+    global workspace_manager, sbt_runner
     workspace_manager = ws_manager
+    sbt_runner = sbt_r
 
 
 # Pydantic models
@@ -98,6 +100,9 @@ async def list_workspaces(request: Request):
 async def delete_workspace(request: Request, workspace_name: str):
     """Delete a workspace and all its files"""
     try:
+        if sbt_runner is not None:
+            # Stop the warm sbt server first; it bind-mounts the directory being removed
+            await sbt_runner.stop_server(workspace_manager.get_workspace_path(workspace_name))
         result = await workspace_manager.delete_workspace(workspace_name)
         return JSONResponse({"status": "success", "data": result})
     except ValueError as e:
@@ -1,18 +1,41 @@
 import os
 import asyncio
+import hashlib
 import logging
 import platform
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
 from .output_process import clean_subprocess_output
 
 logger = logging.getLogger(__name__)
 
+# Pipe read size: large enough that SBT's bursty output drains in few reads
+READ_CHUNK_SIZE = 64 * 1024
+
 
 class SBTRunner:
-    def __init__(self, docker_image: str = "sbtscala/scala-sbt:eclipse-temurin-alpine-21.0.7_6_1.11.2_3.7.1"):
+    def __init__(
+        self,
+        docker_image: str = "sbtscala/scala-sbt:eclipse-temurin-alpine-21.0.7_6_1.11.2_3.7.1",
+        persistent_server: Optional[bool] = None,
+        subprocess_exec: Optional[Callable[..., Awaitable[asyncio.subprocess.Process]]] = None
+    ):
         self.docker_image = docker_image
         self.timeout = 120  # 2 minutes default timeout
+        # Host directory mounted as the container's ~/.cache/coursier. Its v1/ subdirectory is
+        # the coursier cache root, so a host-side `cs fetch` fills it with COURSIER_CACHE=<dir>/v1
+        self.coursier_cache = os.getenv("SCALA_RUNNER_COURSIER_DIR", "/tmp/coursier-cache")
+        # Host directory mounted at /root/.sbt-remote-cache so builds can share compiled
+        # artifacts via `pushRemoteCacheTo := Some(MavenCache(..., file("/root/.sbt-remote-cache")))`
+        self.remote_cache = os.getenv("SBT_REMOTE_CACHE", "/tmp/sbt-remote-cache")
+        # Keep one warm sbt server per workspace and talk to it with `sbt --client`
+        if persistent_server is None:
+            persistent_server = os.getenv("SBT_PERSISTENT_SERVER", "").lower() in ("1", "true", "yes")
+        self.persistent_server = persistent_server
+        self._server_containers: Dict[str, str] = {}  # workspace path -> container name
+        self._server_locks: Dict[str, asyncio.Lock] = {}  # serialises start/stop per workspace
+        # Launcher for docker processes; None means asyncio.create_subprocess_exec
+        self.subprocess_exec = subprocess_exec
 
     def _get_docker_platform_args(self):
         """Get appropriate Docker platform arguments based on the host architecture"""
@@ -54,55 +77,31 @@ class SBTRunner:
         if not workspace_path.exists():
             raise ValueError(f"Workspace path does not exist: {workspace_path}")
         
-        # Validate SBT command
-        if not self._is_valid_sbt_command(command):
-            raise ValueError(f"Invalid or potentially dangerous SBT command: {command}")
-        
-        # Build Docker command
-        # Handle special commands that need to be passed as a single argument to SBT
-        if (command.startswith("runMain ") or command.startswith("testOnly ") or 
-            "runMain" in command or "testOnly" in command):
-            # For commands with runMain/testOnly, pass as a single argument to SBT
-            sbt_commands = [command]
-        else:
-            # Split compound commands like "clean compile" into separate arguments
-            sbt_commands = command.split()
-        
-        # Get platform arguments
-        platform_args = self._get_docker_platform_args()
-        
-        docker_cmd = [
-            "docker", "run", "--rm",
-            f"-v{workspace_path}:/workspace",
-            f"-v/tmp/sbt-cache:/root/.sbt",
-            f"-v/tmp/ivy-cache:/root/.ivy2",
-            f"-v/tmp/coursier-cache:/root/.cache/coursier",
-            "-w", "/workspace",
-            # Add JVM options for stability and ARM compatibility
-            "-e", "JAVA_OPTS=-Xmx2g -Xms512m -XX:+UseG1GC -XX:+UnlockExperimentalVMOptions -XX:+UseContainerSupport",
-            "-e", "SBT_OPTS=-Xmx2g -Xms512m -XX:+UseG1GC",
-        ] + platform_args + [
-            self.docker_image,
-            "sbt"
-        ] + sbt_commands
-        
-        logger.info(f"Running SBT command: {' '.join(docker_cmd)}")
+        sbt_commands = self._split_sbt_command(command)
         
         try:
+            docker_cmd = await self._docker_command(workspace_path, sbt_commands)
+            
+            logger.info(f"Running SBT command: {' '.join(docker_cmd)}")
+            
             # Execute the command
-            process = await asyncio.create_subprocess_exec(
+            process = await self._spawn(
                 *docker_cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
             
             try:
-                # Read stdout and stderr separately for better test compatibility
-                stdout = await process.stdout.read() if process.stdout else b""
-                stderr = await process.stderr.read() if process.stderr else b""
-                
-                # Wait for process to complete with timeout
-                exit_code = await asyncio.wait_for(process.wait(), timeout=timeout or self.timeout)
+                # Drain both pipes concurrently so a chatty stderr can't fill its
+                # pipe and stall SBT, and bound the whole run by the timeout
+                stdout, stderr, exit_code = await asyncio.wait_for(
+                    asyncio.gather(
+                        self._drain(process.stdout),
+                        self._drain(process.stderr),
+                        process.wait(),
+                    ),
+                    timeout=timeout or self.timeout
+                )
                 
             except asyncio.TimeoutError:
                 # Kill the process if it's still running
@@ -158,6 +157,182 @@ class SBTRunner:
                 "status": "error"
             }
 
+    def _spawn(self, *args, **kwargs) -> Awaitable[asyncio.subprocess.Process]:
+        """Start a subprocess with the configured launcher"""
+        launcher = self.subprocess_exec or asyncio.create_subprocess_exec
+        return launcher(*args, **kwargs)
+
+    @staticmethod
+    async def _drain(stream) -> bytes:
+        """Read a subprocess pipe to EOF in fixed-size chunks"""
+        if stream is None:
+            return b""
+        chunks = []
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _split_sbt_command(self, command: str) -> List[str]:
+        """Validate an SBT command and split it into sbt arguments"""
+        # Validate SBT command
+        if not self._is_valid_sbt_command(command):
+            raise ValueError(f"Invalid or potentially dangerous SBT command: {command}")
+        
+        # Handle special commands that need to be passed as a single argument to SBT
+        if (command.startswith("runMain ") or command.startswith("testOnly ") or 
+            "runMain" in command or "testOnly" in command):
+            # For commands with runMain/testOnly, pass as a single argument to SBT
+            return [command]
+        # Split compound commands like "clean compile" into separate arguments
+        return command.split()
+
+    async def _docker_command(self, workspace_path: Path, sbt_commands: List[str]) -> List[str]:
+        """Build the docker argv that runs the given sbt arguments"""
+        if self.persistent_server:
+            container_name = await self._ensure_server_container(workspace_path)
+            # The thin client takes a single command line; chain with ";"
+            return [
+                "docker", "exec", "-w", "/workspace", container_name,
+                "sbt", "--client", "; ".join(sbt_commands)
+            ]
+        return [
+            "docker", "run", "--rm",
+        ] + self._docker_run_args(workspace_path) + [
+            self.docker_image,
+            "sbt"
+        ] + sbt_commands
+
+    async def stream_sbt_command(
+        self,
+        workspace_path,
+        command: str,
+        timeout: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Start an SBT command and return an iterator over its output lines
+        
+        Validation errors are raised here, before anything is streamed. The
+        iterator yields stdout/stderr lines as SBT prints them and finishes
+        with an "[exit] <code>" line. Closing it early kills the process.
+        """
+        if isinstance(workspace_path, str):
+            workspace_path = Path(workspace_path)
+        
+        if not workspace_path.exists():
+            raise ValueError(f"Workspace path does not exist: {workspace_path}")
+        
+        sbt_commands = self._split_sbt_command(command)
+        docker_cmd = await self._docker_command(workspace_path, sbt_commands)
+        
+        logger.info(f"Streaming SBT command: {' '.join(docker_cmd)}")
+        process = await self._spawn(
+            *docker_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        return self._iter_output(process, timeout or self.timeout)
+
+    async def _iter_output(self, process, timeout: int) -> AsyncIterator[str]:
+        """Yield a process's output line by line under an overall deadline"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                line = await asyncio.wait_for(process.stdout.readline(), timeout=remaining)
+                if not line:
+                    break
+                yield line.decode(errors="ignore")
+            exit_code = await asyncio.wait_for(process.wait(), timeout=max(deadline - loop.time(), 0))
+            yield f"[exit] {exit_code}\n"
+        except asyncio.TimeoutError:
+            yield f"[timeout] Command timed out after {timeout} seconds\n"
+        finally:
+            # Client went away or the deadline passed: don't leave sbt running
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await process.wait()
+                except Exception:
+                    pass
+
+    def _docker_run_args(self, workspace_path: Path) -> List[str]:
+        """Volume, working directory, JVM and platform arguments shared by all containers"""
+        return [
+            f"-v{workspace_path}:/workspace",
+            f"-v/tmp/sbt-cache:/root/.sbt",
+            f"-v/tmp/ivy-cache:/root/.ivy2",
+            f"-v{self.coursier_cache}:/root/.cache/coursier",
+            f"-v{self.remote_cache}:/root/.sbt-remote-cache",
+            "-w", "/workspace",
+            # Add JVM options for stability and ARM compatibility
+            "-e", "JAVA_OPTS=-Xmx2g -Xms512m -XX:+UseG1GC -XX:+UnlockExperimentalVMOptions -XX:+UseContainerSupport",
+            "-e", "SBT_OPTS=-Xmx2g -Xms512m -XX:+UseG1GC",
+        ] + self._get_docker_platform_args()
+
+    async def _run_docker(self, *args: str) -> int:
+        """Run a short docker management command and return its exit code"""
+        process = await self._spawn(
+            "docker", *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        return await process.wait()
+
+    def _server_lock(self, key: str) -> asyncio.Lock:
+        """Lock guarding the server container of one workspace"""
+        lock = self._server_locks.get(key)
+        if lock is None:
+            lock = self._server_locks[key] = asyncio.Lock()
+        return lock
+
+    async def _ensure_server_container(self, workspace_path: Path) -> str:
+        """Start (once) the long-lived container hosting the sbt server for a workspace"""
+        key = str(workspace_path.resolve())
+        # Concurrent first calls would otherwise each `docker rm -f` the other's container
+        async with self._server_lock(key):
+            container_name = self._server_containers.get(key)
+            if container_name:
+                return container_name
+            
+            container_name = f"sbt-server-{hashlib.sha1(key.encode()).hexdigest()[:12]}"
+            # Remove a stale container left behind by a previous process
+            await self._run_docker("rm", "-f", container_name)
+            exit_code = await self._run_docker(
+                "run", "-dit", "--name", container_name,
+                *self._docker_run_args(workspace_path),
+                self.docker_image, "/bin/bash"
+            )
+            if exit_code != 0:
+                raise RuntimeError(f"Failed to start sbt server container {container_name}")
+            
+            logger.info(f"Started sbt server container {container_name} for {key}")
+            self._server_containers[key] = container_name
+            return container_name
+
+    async def stop_server(self, workspace_path) -> bool:
+        """Stop the persistent sbt server container for a workspace, if any"""
+        key = str(Path(workspace_path).resolve())
+        async with self._server_lock(key):
+            container_name = self._server_containers.pop(key, None)
+            if not container_name:
+                return False
+            await self._run_docker("rm", "-f", container_name)
+        logger.info(f"Stopped sbt server container {container_name}")
+        return True
+
+    async def stop_all_servers(self) -> int:
+        """Stop every persistent sbt server container"""
+        workspaces = list(self._server_containers)
+        for key in workspaces:
+            await self.stop_server(key)
+        return len(workspaces)
+
     async def compile_project(self, workspace_path: Path) -> Dict:
         """Compile the SBT project"""
         return await self.run_sbt_command(workspace_path, "compile")
@@ -218,7 +393,8 @@ class SBTRunner:
             "compile", "run", "test", "clean", "package", "reload", "update",
             "dependencyTree", "dependencies", "projects", "project", "help",
             "console", "assembly", "publishLocal", "doc", "scaladoc", "about", 
-            "evicted", "dist", "stage", "docker", "dockerize"
+            "evicted", "dist", "stage", "docker", "dockerize",
+            "pullRemoteCache", "pushRemoteCache"
         }
         
         # Allow runMain with class name
@@ -18,6 +18,12 @@ import difflib
 import time
 import glob
 
+# rapidfuzz is optional; fall back to difflib when it is not installed
+try:
+    from rapidfuzz import fuzz
+except ImportError:
+    fuzz = None
+
 logger = logging.getLogger(__name__)
 
 # Whoosh schema for file indexing
@@ -30,6 +36,48 @@ file_schema = Schema(
 )
 
 
+# SEARCH/REPLACE patch markers; each must start its line, after optional indentation
+SEARCH_MARKER = "<<<<<<< SEARCH"
+SEPARATOR_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+PATCH_MARKERS = (SEARCH_MARKER, SEPARATOR_MARKER, REPLACE_MARKER)
+
+
+def _find_marker_line(content: str, marker: str, pos: int) -> Optional[Tuple[int, int]]:
+    """Start and end offsets of the first line from pos (a line start) that begins with marker"""
+    while True:
+        i = content.find(marker, pos)
+        if i < 0:
+            return None
+        line_end = content.find('\n', i)
+        if line_end < 0:
+            line_end = len(content)
+        if i == pos or content[i - 1] == '\n':
+            return i, line_end
+        newline = content.rfind('\n', pos, i)
+        line_start = pos if newline < 0 else newline + 1
+        if not content[line_start:i].strip():
+            return line_start, line_end
+        # Marker text inside a line: nothing else on that line can start it
+        pos = line_end + 1
+
+
+def _similarity(a: str, b: str, cutoff: float = 0.0) -> float:
+    """Similarity ratio of two strings in [0, 1], or 0.0 if it is below cutoff"""
+    # Both scorers compute 2*matches/total, so the shorter string's length caps
+    # the ratio; reject on lengths alone before building any matcher
+    total = len(a) + len(b)
+    if total and 2 * min(len(a), len(b)) / total < cutoff:
+        return 0.0
+    if fuzz is not None:
+        return fuzz.ratio(a, b, score_cutoff=cutoff * 100) / 100
+    matcher = difflib.SequenceMatcher(None, a, b)
+    # Cheap upper bound next, so hopeless candidates skip the full match
+    if matcher.quick_ratio() < cutoff:
+        return 0.0
+    ratio = matcher.ratio()
+    return ratio if ratio >= cutoff else 0.0
+
 
 class WorkspaceManager:
     def __init__(self, base_dir: str = "/tmp"):
@@ -332,6 +380,40 @@ class WorkspaceManager:
             "size": len(content)
         }
 
+    async def update_files(self, workspace_name: str, files: List[Dict[str, str]]) -> Dict:
+        """Upsert several files in one call
+
+        Args:
+            workspace_name: Name of the workspace
+            files: List of {"file_path": ..., "content": ...} dicts
+
+        Returns:
+            Dict with a per-file result list and success counts
+        """
+        workspace_path = self.workspaces_dir / workspace_name
+        if not workspace_path.exists():
+            raise ValueError(f"Workspace '{workspace_name}' not found")
+        
+        results = []
+        for file in files:
+            try:
+                result = await self.update_file(workspace_name, file["file_path"], file["content"])
+                results.append({**result, "status": "success"})
+            except Exception as e:
+                logger.error(f"Error writing {workspace_name}/{file['file_path']}: {e}")
+                results.append({
+                    "file_path": file["file_path"],
+                    "status": "error",
+                    "error": str(e)
+                })
+        
+        return {
+            "workspace_name": workspace_name,
+            "files": results,
+            "total_files": len(results),
+            "successful_files": sum(1 for r in results if r["status"] == "success")
+        }
+
     async def delete_file(self, workspace_name: str, file_path: str) -> Dict:
         """Delete a file from the workspace"""
         workspace_path = self.workspaces_dir / workspace_name
@@ -557,6 +639,8 @@ class WorkspaceManager:
             
             patches = self._parse_search_replace_format(patch_content)
             modified_files = []
+            # Final content of each modified file, indexed once all hunks are in
+            updated_contents = {}
             
             for patch in patches:
                 file_path = patch["file_path"]
@@ -573,14 +657,7 @@ class WorkspaceManager:
                         "status": "success",
                         "changes_applied": 1
                     })
-                    
-                    # Re-index the modified file
-                    try:
-                        async with aiofiles.open(workspace_path / file_path, "r") as f:
-                            content = await f.read()
-                        await self._index_file(workspace_name, file_path, content)
-                    except Exception as e:
-                        logger.warning(f"Failed to re-index {file_path}: {e}")
+                    updated_contents[file_path] = result["content"]
                 else:
                     modified_files.append({
                         "file_path": file_path,
@@ -589,6 +666,13 @@ class WorkspaceManager:
                         "changes_applied": 0
                     })
             
+            # Re-index the modified files from the content just written
+            for file_path, content in updated_contents.items():
+                try:
+                    await self._index_file(workspace_name, file_path, content)
+                except Exception as e:
+                    logger.warning(f"Failed to re-index {file_path}: {e}")
+            
             successful_files = len([f for f in modified_files if f["status"] == "success"])
         
             logger.info(f"Applied search-replace patch to workspace: {workspace_name}")
@@ -852,55 +936,38 @@ class WorkspaceManager:
     def _parse_search_replace_format(self, patch_content: str) -> List[Dict]:
         """Parse search-replace format patches"""
         patches = []
-        lines = patch_content.strip().split('\n')
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        content = patch_content.strip()
+        pos = 0
+        
+        # Jump from marker to marker with str.find and slice the hunk bodies out
+        # directly, rather than walking and re-joining every line
+        while True:
+            search = _find_marker_line(content, SEARCH_MARKER, pos)
+            if search is None:
+                break
+            separator = _find_marker_line(content, SEPARATOR_MARKER, search[1] + 1)
+            if separator is None:
+                break
+            end = _find_marker_line(content, REPLACE_MARKER, separator[1] + 1)
+            if end is None:
+                break
             
-            # Look for file path (any line that doesn't start with <<<, =, >>>)
-            if (line and 
-                not line.startswith('<<<<<<< SEARCH') and 
-                not line.startswith('=======') and 
-                not line.startswith('>>>>>>> REPLACE')):
-                
-                # This should be a file path
-                file_path = line
-                search_lines = []
-                replace_lines = []
-                
-                # Look for search section
-                i += 1
-                while i < len(lines) and not lines[i].strip().startswith('<<<<<<< SEARCH'):
-                    i += 1
-                
-                if i >= len(lines):
-                    break
-                
-                # Found search marker, collect search content
-                i += 1  # Skip the <<<<<<< SEARCH line
-                while i < len(lines) and not lines[i].strip().startswith('======='):
-                    search_lines.append(lines[i])
-                    i += 1
-                
-                if i >= len(lines):
+            # The file path is the first non-blank, non-marker line before SEARCH
+            file_path = None
+            for line in content[pos:search[0]].split('\n'):
+                line = line.strip()
+                if line and not line.startswith(PATCH_MARKERS):
+                    file_path = line
                     break
-                
-                # Found separator, collect replace content
-                i += 1  # Skip the ======= line
-                while i < len(lines) and not lines[i].strip().startswith('>>>>>>> REPLACE'):
-                    replace_lines.append(lines[i])
-                    i += 1
-                
-                if i < len(lines):
-                    # Found end marker
-                    patches.append({
-                        "file_path": file_path,
-                        "search": '\n'.join(search_lines),
-                        "replace": '\n'.join(replace_lines)
-                    })
+            pos = end[1] + 1
+            if file_path is None:
+                continue
             
-            i += 1
+            patches.append({
+                "file_path": file_path,
+                "search": content[search[1] + 1:separator[0]][:-1],
+                "replace": content[separator[1] + 1:end[0]][:-1]
+            })
         
         return patches
 
@@ -1011,7 +1078,7 @@ class WorkspaceManager:
             normalized_candidate = self._normalize_spaces_for_matching(candidate_text)
             
             # Calculate similarity
-            ratio = difflib.SequenceMatcher(None, normalized_search, normalized_candidate).ratio()
+            ratio = _similarity(normalized_search, normalized_candidate, 0.8)
             
             if ratio > best_ratio and ratio > 0.8:  # High threshold for normalized matching
                 best_ratio = ratio
@@ -1023,61 +1090,63 @@ class WorkspaceManager:
         return best_match
 
     async def _apply_search_replace_to_file(self, workspace_path: Path, file_path: str, search_content: str, replace_content: str) -> Dict:
-        """Apply search-replace operation to a specific file"""
+        """Apply search-replace operation to a specific file
+
+        Files with CRLF line endings keep them: search and replace text are
+        converted to the file's line ending before matching and writing.
+        """
         full_path = workspace_path / file_path
         
         try:
-            # Read existing file
+            # Read existing file as raw bytes; only the looser matchers need text
             if full_path.exists():
-                async with aiofiles.open(full_path, "r") as f:
-                    original_content = await f.read()
+                async with aiofiles.open(full_path, "rb") as f:
+                    original_data = await f.read()
             else:
                 # Create parent directories if needed for new files
                 full_path.parent.mkdir(parents=True, exist_ok=True)
-                original_content = ""
+                original_data = b""
+            newline = "\r\n" if b"\r\n" in original_data else "\n"
             
+            new_content = None
             # Perform the replacement
             if search_content.strip() == "":
                 # If search is empty, append replace content
-                new_content = original_content + replace_content
+                new_data = original_data + self._with_line_ending(replace_content, newline).encode()
             else:
-                # Try exact match first
-                if search_content in original_content:
+                # Try an exact match on the bytes first: UTF-8 is self-synchronizing,
+                # so a byte match is a character match and nothing needs decoding
+                search_data = self._with_line_ending(search_content, newline).encode()
+                start_pos = original_data.find(search_data)
+                if start_pos >= 0:
                     # For exact match, preserve indentation from the original matched content
-                    start_pos = original_content.find(search_content)
-                    end_pos = start_pos + len(search_content)
-                    matched_content = original_content[start_pos:end_pos]
-                    indentation_preserved_replacement = self._preserve_indentation_in_replacement(matched_content, replace_content)
-                    new_content = original_content[:start_pos] + indentation_preserved_replacement + original_content[end_pos:]
+                    indentation_preserved_replacement = self._preserve_indentation_in_replacement(search_content, replace_content)
+                    view = memoryview(original_data)
+                    new_data = b"".join((
+                        view[:start_pos],
+                        self._with_line_ending(indentation_preserved_replacement, newline).encode(),
+                        view[start_pos + len(search_data):]
+                    ))
                 else:
-                    # Try space-normalized matching
-                    match_result = self._find_best_match_with_normalized_spaces(original_content, search_content)
-                    if match_result["found"]:
-                        # Replace the matched section with preserved indentation
-                        start_pos = match_result["start_pos"]
-                        end_pos = match_result["end_pos"]
-                        matched_content = original_content[start_pos:end_pos]
-                        indentation_preserved_replacement = self._preserve_indentation_in_replacement(matched_content, replace_content)
-                        new_content = original_content[:start_pos] + indentation_preserved_replacement + original_content[end_pos:]
-                    else:
-                        # Try fuzzy matching for more flexible replacement
-                        fuzzy_result = self._fuzzy_replace(original_content, search_content, replace_content)
-                        if fuzzy_result["found"]:
-                            new_content = fuzzy_result["content"]
-                        else:
-                            return {
-                                "success": False,
-                                "error": f"Search content not found in {file_path}. Searched for: {search_content[:100]}..."
-                            }
+                    # Decode with universal newlines, as a text-mode read would
+                    original_content = original_data.decode().replace('\r\n', '\n').replace('\r', '\n')
+                    new_content = self._replace_in_text(original_content, search_content, replace_content)
+                    if new_content is None:
+                        return {
+                            "success": False,
+                            "error": f"Search content not found in {file_path}. Searched for: {search_content[:100]}..."
+                        }
+                    new_data = self._with_line_ending(new_content, newline).encode()
         
         # Write the modified file
-            async with aiofiles.open(full_path, "w") as f:
-                await f.write(new_content)
+            async with aiofiles.open(full_path, "wb") as f:
+                await f.write(new_data)
         
             return {
                 "success": True,
-                "original_length": len(original_content),
-                "new_length": len(new_content)
+                "original_length": len(original_data),
+                "new_length": len(new_data),
+                "content": new_content if new_content is not None else new_data.decode(errors="ignore")
             }
             
         except Exception as e:
@@ -1086,21 +1155,52 @@ class WorkspaceManager:
                 "error": f"Error modifying {file_path}: {str(e)}"
             }
 
+    @staticmethod
+    def _with_line_ending(text: str, newline: str) -> str:
+        """Convert text's line endings to newline ("\\n" or "\\r\\n")"""
+        text = text.replace("\r\n", "\n")
+        return text if newline == "\n" else text.replace("\n", newline)
+
+    def _replace_in_text(self, original_content: str, search_content: str, replace_content: str) -> Optional[str]:
+        """Replace search_content in text by exact, space-normalized or fuzzy match; None if not found"""
+        # Exact match still applies when the text differs from the raw bytes, e.g. CRLF files
+        start_pos = original_content.find(search_content)
+        if start_pos >= 0:
+            # For exact match, preserve indentation from the original matched content
+            end_pos = start_pos + len(search_content)
+            indentation_preserved_replacement = self._preserve_indentation_in_replacement(search_content, replace_content)
+            return original_content[:start_pos] + indentation_preserved_replacement + original_content[end_pos:]
+        
+        # Try space-normalized matching
+        match_result = self._find_best_match_with_normalized_spaces(original_content, search_content)
+        if match_result["found"]:
+            # Replace the matched section with preserved indentation
+            start_pos = match_result["start_pos"]
+            end_pos = match_result["end_pos"]
+            matched_content = original_content[start_pos:end_pos]
+            indentation_preserved_replacement = self._preserve_indentation_in_replacement(matched_content, replace_content)
+            return original_content[:start_pos] + indentation_preserved_replacement + original_content[end_pos:]
+        
+        # Try fuzzy matching for more flexible replacement
+        fuzzy_result = self._fuzzy_replace(original_content, search_content, replace_content)
+        if fuzzy_result["found"]:
+            return fuzzy_result["content"]
+        return None
+
     def _fuzzy_replace(self, content: str, search_content: str, replace_content: str) -> Dict:
         """Perform fuzzy matching and replacement with space normalization"""
         lines = content.split('\n')
-        search_lines = search_content.strip().split('\n')
-        
-        if not search_lines:
+        stripped_search = search_content.strip()
+        if not stripped_search:
             return {"found": False, "content": content}
+        search_lines = stripped_search.split('\n')
         
-        # Use difflib to find the best matching sequence
         best_match_ratio = 0
         best_match_start = -1
         best_match_end = -1
         
         # Normalize search content for comparison
-        normalized_search = self._normalize_spaces_for_matching(search_content.strip())
+        normalized_search = self._normalize_spaces_for_matching(stripped_search)
         
         # Try to find a contiguous block that best matches the search content
         for start_idx in range(len(lines) - len(search_lines) + 1):
@@ -1108,12 +1208,16 @@ class WorkspaceManager:
             candidate_lines = lines[start_idx:end_idx]
             candidate_text = '\n'.join(candidate_lines)
             
+            # Only a candidate that beats both the threshold and the best so far
+            # matters, so let the scorer give up early on anything else
+            cutoff = max(best_match_ratio, 0.7)
+            
             # Calculate similarity ratio using both original and normalized content
-            original_ratio = difflib.SequenceMatcher(None, search_content.strip(), candidate_text.strip()).ratio()
+            original_ratio = _similarity(stripped_search, candidate_text.strip(), cutoff)
             
             # Also calculate normalized ratio for better space-insensitive matching
             normalized_candidate = self._normalize_spaces_for_matching(candidate_text.strip())
-            normalized_ratio = difflib.SequenceMatcher(None, normalized_search, normalized_candidate).ratio()
+            normalized_ratio = _similarity(normalized_search, normalized_candidate, cutoff)
             
             # Use the higher ratio for better matching
             ratio = max(original_ratio, normalized_ratio)
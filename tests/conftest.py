@@ -0,0 +1,232 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import httpx
+import pytest # type: ignore
+import pytest_asyncio
+from fastapi.testclient import TestClient
+
+# Under pytest-xdist give each worker its own workspace root: the Whoosh
+# search index lives there and only one process may write it at a time
+_xdist_worker = os.getenv("PYTEST_XDIST_WORKER")
+if _xdist_worker:
+    _base_dir = os.getenv("BASE_DIR", os.path.expanduser("~/scala-runner-workspaces"))
+    os.environ["BASE_DIR"] = os.path.join(_base_dir, f"xdist-{_xdist_worker}")
+
+from scala_runner.main import app, sbt_runner, workspace_manager
+from scala_runner.routers import sbt as sbt_router
+
+# Shared assertion helpers get pytest's assert rewriting, like test modules
+pytest.register_assert_rewrite("helpers")
+from helpers import ws_name
+
+PARSE_SCALA_PATH = Path(__file__).parent / "scala_files" / "parse.scala"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="run tests marked integration (need Docker and SBT)",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    """Group tests for xdist and skip integration tests unless --run-integration is given"""
+    run_integration = config.getoption("--run-integration")
+    skip_integration = pytest.mark.skip(reason="needs --run-integration")
+    for item in items:
+        # Under --dist=loadgroup keep a module on one worker so its module and
+        # session fixtures are shared, unless a test names its own group.
+        # tryfirst: xdist reads the marker in its own collection hook
+        if not item.get_closest_marker("xdist_group"):
+            item.add_marker(pytest.mark.xdist_group(item.module.__name__))
+        if not run_integration and "integration" in item.keywords:
+            item.add_marker(skip_integration)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient (and app lifespan) for the whole session"""
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    """httpx AsyncClient bound to the app, for tests that overlap requests"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def session_workspaces(client):
+    """Workspaces created during the session, all deleted once at session end"""
+    names = set()
+    yield names
+
+    # Sequential on purpose: deletes rmtree on the event loop and take the
+    # shared search-index writer lock, so concurrent deletes would just queue
+    for workspace_name in names:
+        try:
+            client.delete(f"/workspaces/{workspace_name}")
+        except Exception:
+            pass
+
+
+@pytest.fixture
+def make_workspace(client, session_workspaces):
+    """Factory fixture that creates workspaces; they are swept at session end"""
+
+    def _make(prefix: str = "test-workspace") -> str:
+        workspace_name = ws_name(prefix)
+        resp = client.post("/workspaces", json={"name": workspace_name})
+        assert resp.status_code == 200, resp.text
+        session_workspaces.add(workspace_name)
+        return workspace_name
+
+    return _make
+
+
+@pytest.fixture
+def workspace_name():
+    """Unique workspace name (not created) for tests that manage the workspace themselves"""
+    return ws_name()
+
+
+@pytest.fixture
+def workspace(make_workspace):
+    """A fresh workspace name for tests that need just one"""
+    return make_workspace()
+
+
+@pytest.fixture
+def workspace_root(workspace):
+    """On-disk root of the workspace fixture, for seeding or reading files directly"""
+    return workspace_manager.get_workspace_path(workspace)
+
+
+# Artifacts resolved by the integration tests: the default project template,
+# the Scala 3 feature tests and the cats-parse project
+WARM_ARTIFACTS = [
+    "org.scala-lang:scala-compiler:2.13.14",
+    "org.typelevel:cats-core_2.13:2.12.0",
+    "org.scalatest:scalatest_2.13:3.2.17",
+    "org.scala-lang:scala3-compiler_3:3.7.1",
+    "org.scala-lang:scala3-sbt-bridge:3.7.1",
+    "org.scalameta:munit_3:0.7.29",
+    # the cats-parse project pins scalaVersion 3.6.4
+    "org.scala-lang:scala3-compiler_3:3.6.4",
+    "org.scala-lang:scala3-sbt-bridge:3.6.4",
+    "org.typelevel:cats-parse_3:1.1.0",
+]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_coursier(request):
+    """Pre-fetch shared artifacts into the mounted coursier cache once per session"""
+    if shutil.which("cs") is None or not request.config.getoption("--run-integration"):
+        return
+    if not any(item.get_closest_marker("integration") for item in request.session.items):
+        return
+    # The mount is the container's ~/.cache/coursier; its v1/ tree is the cache root sbt reads
+    env = {**os.environ, "COURSIER_CACHE": os.path.join(sbt_runner.coursier_cache, "v1")}
+    try:
+        subprocess.run(
+            ["cs", "fetch", *WARM_ARTIFACTS],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=300,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        # Best effort: sbt resolves anything still missing
+        pass
+
+
+@pytest.fixture(scope="session", autouse=True)
+def pull_sbt_image(request):
+    """Pull the SBT image once per session so no test pays for (or times out on) the pull"""
+    if os.getenv("SCALA_RUNNER_SKIP_PULL") or shutil.which("docker") is None:
+        return
+    if not request.config.getoption("--run-integration"):
+        return
+    if not any(item.get_closest_marker("integration") for item in request.session.items):
+        return
+    image = sbt_runner.docker_image
+    inspect = subprocess.run(
+        ["docker", "image", "inspect", image],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if inspect.returncode == 0:
+        return
+    try:
+        subprocess.run(
+            ["docker", "pull", *sbt_runner._get_docker_platform_args(), image],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=600,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        pytest.exit(f"docker pull {image} failed: {e.stderr.decode(errors='replace').strip()}", returncode=1)
+    except subprocess.TimeoutExpired:
+        pytest.exit(f"docker pull {image} timed out", returncode=1)
+
+
+@pytest.fixture(scope="session")
+def parse_scala_src():
+    """Contents of tests/scala_files/parse.scala, read once per session"""
+    if not PARSE_SCALA_PATH.exists():
+        pytest.skip(f"{PARSE_SCALA_PATH} not found")
+    return PARSE_SCALA_PATH.read_text()
+
+
+@pytest.fixture(scope="session")
+def warm_workspace(client):
+    """Workspace shared by tests that never run sbt; each writes under its own top-level directory"""
+    workspace_name = ws_name("test-warm")
+    resp = client.post("/workspaces", json={"name": workspace_name})
+    assert resp.status_code == 200, resp.text
+    yield workspace_name
+    client.delete(f"/workspaces/{workspace_name}")
+
+
+@pytest.fixture(scope="session")
+def compiled_workspace(client):
+    """Default project (cats-core, scalatest) compiled once per session.
+
+    Tests only add sources, so later compiles are incremental and reuse the
+    resolved dependencies. Never run sbt clean against it.
+    """
+    workspace_name = ws_name("test-compiled")
+    resp = client.post("/workspaces", json={"name": workspace_name})
+    assert resp.status_code == 200, resp.text
+
+    try:
+        resp = client.post("/sbt/compile", json={"workspace_name": workspace_name})
+        assert resp.status_code == 200, resp.text
+        yield workspace_name
+    finally:
+        client.delete(f"/workspaces/{workspace_name}")
+
+
+class _FakeSbt:
+    """Stand-in SBT runner for tests that must never start a JVM"""
+
+    def __getattr__(self, name):
+        async def _unexpected(*args, **kwargs):
+            raise AssertionError(f"SBTRunner.{name} called from a test using no_sbt")
+        return _unexpected
+
+
+@pytest.fixture
+def no_sbt(monkeypatch):
+    """Swap the SBT router's runner for a fake; restored on teardown"""
+    monkeypatch.setattr(sbt_router, "sbt_runner", _FakeSbt())
@@ -0,0 +1,14 @@
+"""Plain helpers shared by the test modules and conftest.py"""
+
+import uuid
+
+
+def ws_name(prefix: str = "test-ws") -> str:
+    """Collision-free workspace name, safe across parallel workers"""
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+def assert_all_in(haystack, needles, what="output"):
+    """Assert every needle occurs in haystack, reporting all the missing ones at once"""
+    missing = [n for n in needles if n not in haystack]
+    assert not missing, f"{missing} not found in {what}"
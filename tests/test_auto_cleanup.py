@@ -1,20 +1,15 @@
 import pytest
 import asyncio
 import time
-import random
-from fastapi.testclient import TestClient
-from scala_runner.main import app
 from scala_runner.bash_session_manager import BashSessionManager
 from scala_runner.workspace_manager import WorkspaceManager
 
-client = TestClient(app)
-
 
 class TestAutoCleanup:
     """Test automatic cleanup functionality for bash sessions"""
 
     @pytest.mark.integration
-    def test_auto_cleanup_configuration(self):
+    def test_auto_cleanup_configuration(self, client):
         """Test configuring auto-cleanup settings"""
         # Get current settings
         response = client.get("/bash/auto-cleanup/stats")
@@ -53,7 +48,7 @@ class TestAutoCleanup:
         print("✅ Configuration verified")
 
     @pytest.mark.integration
-    def test_auto_cleanup_start_stop(self):
+    def test_auto_cleanup_start_stop(self, client):
         """Test starting and stopping auto-cleanup (API endpoints)"""
         # Note: TestClient doesn't maintain asyncio context between requests,
         # so we test the API endpoints but can't verify persistent task state
@@ -101,13 +96,8 @@ class TestAutoCleanup:
         print("✅ Auto-cleanup stats endpoint returns proper structure")
 
     @pytest.mark.integration 
-    def test_manual_cleanup_with_timeout_simulation(self):
+    def test_manual_cleanup_with_timeout_simulation(self, client, workspace_name):
         """Test manual cleanup functionality that simulates timeout behavior"""
-        workspace_name = f"cleanup-test-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -188,13 +178,8 @@ class TestAutoCleanup:
             print("✅ Reset to default configuration")
 
     @pytest.mark.integration
-    def test_cleanup_stats_detail(self):
+    def test_cleanup_stats_detail(self, client, workspace_name):
         """Test detailed cleanup statistics"""
-        workspace_name = f"stats-test-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -239,13 +224,8 @@ class TestAutoCleanup:
             client.delete(f"/workspaces/{workspace_name}")
 
     @pytest.mark.integration
-    def test_manual_cleanup_enhanced(self):
+    def test_manual_cleanup_enhanced(self, client, workspace_name):
         """Test enhanced manual cleanup with detailed output"""
-        workspace_name = f"manual-cleanup-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -1,22 +1,12 @@
 import pytest
-from fastapi.testclient import TestClient
-from scala_runner.main import app
-import time
-import random
 
-client = TestClient(app)
 
 class TestBashSessionContinuity:
     """Test suite for verifying continuous command execution in bash sessions"""
 
     @pytest.mark.integration
-    def test_session_state_persistence(self):
+    def test_session_state_persistence(self, client, workspace_name):
         """Test that session state persists across multiple commands"""
-        workspace_name = f"continuity-test-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -167,13 +157,8 @@ class TestBashSessionContinuity:
             print("✅ Workspace cleaned up")
 
     @pytest.mark.integration
-    def test_scala_project_workflow(self):
+    def test_scala_project_workflow(self, client, workspace_name):
         """Test a complete Scala project workflow in one session"""
-        workspace_name = f"scala-workflow-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -346,13 +331,8 @@ EOF"""
             print("✅ Workspace cleaned up")
 
     @pytest.mark.integration
-    def test_session_variables_and_aliases(self):
+    def test_session_variables_and_aliases(self, client, workspace_name):
         """Test that shell variables, aliases, and functions persist across commands"""
-        workspace_name = f"vars-test-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
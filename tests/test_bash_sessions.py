@@ -1,22 +1,12 @@
 import pytest
-from fastapi.testclient import TestClient
-from scala_runner.main import app
-import time
-import random
 
-client = TestClient(app)
 
 class TestBashSessions:
     """Test suite for bash session functionality"""
 
     @pytest.mark.integration 
-    def test_bash_session_lifecycle(self):
+    def test_bash_session_lifecycle(self, client, workspace_name):
         """Test creating, using, and closing a bash session"""
-        workspace_name = f"bash-test-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -89,13 +79,8 @@ class TestBashSessions:
             client.delete(f"/workspaces/{workspace_name}")
 
     @pytest.mark.integration
-    def test_bash_session_file_operations(self):
+    def test_bash_session_file_operations(self, client, workspace_name):
         """Test file operations in bash session"""
-        workspace_name = f"bash-files-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -136,13 +121,8 @@ class TestBashSessions:
             client.delete(f"/workspaces/{workspace_name}")
 
     @pytest.mark.integration
-    def test_bash_session_scala_compilation(self):
+    def test_bash_session_scala_compilation(self, client, workspace_name):
         """Test using bash session to compile Scala code"""
-        workspace_name = f"bash-scala-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -187,13 +167,8 @@ class TestBashSessions:
             client.delete(f"/workspaces/{workspace_name}")
 
     @pytest.mark.integration
-    def test_bash_session_error_handling(self):
+    def test_bash_session_error_handling(self, client, workspace_name):
         """Test error handling in bash sessions"""
-        workspace_name = f"bash-error-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -235,13 +210,8 @@ class TestBashSessions:
             client.delete(f"/workspaces/{workspace_name}")
 
     @pytest.mark.integration
-    def test_bash_session_multiple_sessions(self):
+    def test_bash_session_multiple_sessions(self, client, workspace_name):
         """Test multiple bash sessions in same workspace"""
-        workspace_name = f"bash-multi-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
         # Create workspace
         response = client.post("/workspaces", json={"name": workspace_name})
         assert response.status_code == 200
@@ -1,48 +1,42 @@
 import asyncio
 import pytest # type: ignore
-from fastapi.testclient import TestClient
-from scala_runner.main import app  # adjust import path if needed
-from unittest.mock import AsyncMock, patch, Mock
+from unittest.mock import AsyncMock
 
-client = TestClient(app)
+from pydantic import ValidationError
 
-class DummyProcess:
-    def __init__(self, stdout=b"", stderr=b"", returncode=0):
-        self.stdout = stdout
-        self.stderr = stderr
-        self.returncode = returncode
+from scala_runner.routers.files import (
+    BatchUpdateFilesRequest,
+    CreateFileRequest,
+    PatchFileRequest,
+    UpdateFileRequest,
+)
+from scala_runner.routers.search import SearchRequest
+from scala_runner.sbt_runner import SBTRunner
 
-    async def communicate(self):
-        return self.stdout, self.stderr
 
-async def fake_success_create(*args, **kwargs):
-    # Simulate a successful Docker run
-    return DummyProcess(stdout=b"Hello, Scala!", returncode=0)
-
-async def fake_fail_create(*args, **kwargs):
-    # Simulate a failed Docker run
-    return DummyProcess(stderr=b"Docker error!", returncode=1)
-
-@pytest.fixture(autouse=True)
-def patch_async_subprocess(monkeypatch):
-    # By default, patch asyncio.create_subprocess_exec to succeed
-    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_success_create)
+@pytest.fixture
+def mock_sbt(monkeypatch):
+    # Replace the async SBTRunner entry points the endpoints dispatch to
+    compile_mock = AsyncMock()
+    monkeypatch.setattr(SBTRunner, "compile_project", compile_mock)
+    monkeypatch.setattr(SBTRunner, "clean_project", AsyncMock())
+    return compile_mock
 
 # Old /run endpoint tests removed as that endpoint no longer exists
 
-def test_ping():
+def test_ping(client):
     """Test the ping endpoint"""
     response = client.get("/ping")
     assert response.status_code == 200
     assert response.json() == {"status": "pong"}
 
-def test_openapi_alias():
+def test_openapi_alias(client):
     """Test the openapi alias endpoint"""
     response = client.get("/openapi")
     assert response.status_code == 200
     assert "openapi" in response.json()
 
-def test_list_workspaces_empty():
+def test_list_workspaces_empty(client):
     """Test listing workspaces when none exist"""
     response = client.get("/workspaces")
     assert response.status_code == 200
@@ -50,13 +44,8 @@ def test_list_workspaces_empty():
     assert data["status"] == "success"
     assert isinstance(data["data"], list)
 
-def test_create_workspace():
+def test_create_workspace(client, workspace_name):
     """Test creating a workspace"""
-    workspace_name = "test-create-workspace"
-    
-    # Clean up first in case it exists
-    client.delete(f"/workspaces/{workspace_name}")
-    
     response = client.post("/workspaces", json={"name": workspace_name})
     assert response.status_code == 200
     data = response.json()
@@ -66,74 +55,111 @@ def test_create_workspace():
     # Clean up
     client.delete(f"/workspaces/{workspace_name}")
 
-def test_create_workspace_invalid_name():
+def test_create_workspace_invalid_name(client):
     """Test creating workspace with invalid name"""
     response = client.post("/workspaces", json={"name": "invalid@name"})
     assert response.status_code == 400
 
-def test_delete_nonexistent_workspace():
+def test_delete_nonexistent_workspace(client):
     """Test deleting a workspace that doesn't exist"""
     response = client.delete("/workspaces/nonexistent")
     assert response.status_code == 404
 
-@patch('scala_runner.sbt_runner.SBTRunner.compile_project')
-def test_sbt_compile_workspace_not_found(mock_compile):
-    """Test SBT compile with non-existent workspace"""
-    response = client.post("/sbt/compile", json={"workspace_name": "nonexistent"})
-    assert response.status_code == 404
+def test_delete_workspace_stops_sbt_server(client, workspace_name, monkeypatch):
+    """Test deleting a workspace stops its persistent sbt server container"""
+    stop_server = AsyncMock(return_value=True)
+    monkeypatch.setattr(SBTRunner, "stop_server", stop_server)
+    assert client.post("/workspaces", json={"name": workspace_name}).status_code == 200
+    
+    response = client.delete(f"/workspaces/{workspace_name}")
+    assert response.status_code == 200
+    stop_server.assert_awaited_once()
+    assert stop_server.call_args[0][0].name == workspace_name
+
+@pytest.mark.asyncio
+async def test_sbt_endpoints_workspace_not_found(async_client, mock_sbt):
+    """Test SBT compile and clean with non-existent workspace"""
+    compile_resp, clean_resp = await asyncio.gather(
+        async_client.post("/sbt/compile", json={"workspace_name": "nonexistent"}),
+        async_client.post("/sbt/clean", json={"workspace_name": "nonexistent"}),
+    )
+    assert compile_resp.status_code == 404
+    assert clean_resp.status_code == 404
+    mock_sbt.assert_not_awaited()
 
-@patch('scala_runner.sbt_runner.SBTRunner.clean_project')  
-def test_sbt_clean_workspace_not_found(mock_clean):
-    """Test SBT clean with non-existent workspace"""
-    response = client.post("/sbt/clean", json={"workspace_name": "nonexistent"})
+def test_sbt_compile_stream_workspace_not_found(client):
+    """Test streaming compile with non-existent workspace"""
+    response = client.post("/sbt/compile/stream", json={"workspace_name": "nonexistent"})
     assert response.status_code == 404
 
+@pytest.mark.parametrize("endpoint,extra,command", [
+    pytest.param("/sbt/compile/stream", {}, "compile", id="compile"),
+    pytest.param("/sbt/run/stream", {"command": "clean compile"}, "clean compile", id="run"),
+])
+def test_sbt_stream_endpoints(client, workspace, monkeypatch, endpoint, extra, command):
+    """Test the streaming SBT endpoints pass the runner's lines through in order"""
+    chunks = [
+        "[info] compiling 1 Scala source\n",
+        "[success] Total time: 2 s\n",
+        "[exit] 0\n",
+    ]
+
+    async def _lines():
+        for chunk in chunks:
+            yield chunk
+
+    stream_mock = AsyncMock(return_value=_lines())
+    monkeypatch.setattr(SBTRunner, "stream_sbt_command", stream_mock)
+
+    with client.stream("POST", endpoint, json={"workspace_name": workspace, **extra}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert list(response.iter_lines()) == [chunk.rstrip("\n") for chunk in chunks]
+    assert stream_mock.call_args[0][1] == command
+
 def test_search_files_missing_workspace():
     """Test search with missing workspace parameter"""
-    response = client.post("/search", json={"query": "test"})
-    assert response.status_code == 422  # Validation error
+    with pytest.raises(ValidationError):
+        SearchRequest(query="test")
 
 def test_create_file_missing_parameters():
     """Test creating file with missing parameters"""
-    response = client.post("/files", json={"workspace_name": "test"})
-    assert response.status_code == 422  # Validation error
+    with pytest.raises(ValidationError):
+        CreateFileRequest(workspace_name="test")
 
 def test_update_file_missing_parameters():
     """Test updating file with missing parameters"""
-    response = client.put("/files", json={"workspace_name": "test"})
-    assert response.status_code == 422  # Validation error
+    with pytest.raises(ValidationError):
+        UpdateFileRequest(workspace_name="test")
 
+def test_get_file(client, workspace, workspace_root):
+    """Test reading a file through GET /files"""
+    (workspace_root / "hello.txt").write_text("hello")
+    response = client.get(f"/files/{workspace}/hello.txt")
+    assert response.status_code == 200
+    assert response.json()["data"]["content"] == "hello"
 
-class TestPatchFilesAPI:
-    """Test the PATCH /files endpoint for git diff functionality"""
+def test_batch_update_files_empty_list():
+    """Test batch file update with no files"""
+    with pytest.raises(ValidationError):
+        BatchUpdateFilesRequest(workspace_name="test", files=[])
 
-    def test_patch_files_success(self):
-        """Test successful patch application"""
-        workspace_name = "test-patch-workspace"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create initial file
-        initial_content = """object Test {
+def test_batch_update_files_workspace_not_found(client):
+    """Test batch file update with non-existent workspace"""
+    response = client.put("/files/batch", json={
+        "workspace_name": "nonexistent",
+        "files": [{"file_path": "a.txt", "content": "a"}]
+    })
+    assert response.status_code == 404
+
+
+PATCH_TEST_SCALA = """object Test {
   def main(args: Array[String]): Unit = {
     println("Hello, World!")
   }
 }"""
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/Test.scala",
-            "content": initial_content
-        })
-        assert response.status_code == 200
-        
-        # Apply patch
-        patch_content = """--- a/src/main/scala/Test.scala
+
+PATCH_TEST_SCALA_DIFF = """--- a/src/main/scala/Test.scala
 +++ b/src/main/scala/Test.scala
 @@ -1,5 +1,5 @@
  object Test {
@@ -142,42 +168,8 @@ class TestPatchFilesAPI:
 +    println("Hello, Patched!")
    }
  }"""
-        
-        response = client.patch("/files", json={
-            "workspace_name": workspace_name,
-            "patch": patch_content
-        })
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        assert data["data"]["patch_applied"] is True
-        assert data["data"]["results"]["total_files"] == 1
-        assert data["data"]["results"]["successful_files"] == 1
-        
-        # Verify file was changed
-        response = client.get(f"/files/{workspace_name}/src/main/scala/Test.scala")
-        assert response.status_code == 200
-        content = response.json()["data"]["content"]
-        assert "Hello, Patched!" in content
-        assert "Hello, World!" not in content
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
-    def test_patch_files_create_new_file(self):
-        """Test patch that creates a new file"""
-        workspace_name = "test-patch-new-file"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Apply patch that creates new file
-        patch_content = """--- /dev/null
+PATCH_NEW_FILE_DIFF = """--- /dev/null
 +++ b/src/main/scala/NewFile.scala
 @@ -0,0 +1,5 @@
 +object NewFile {
@@ -185,55 +177,8 @@ class TestPatchFilesAPI:
 +    "Hello from new file!"
 +  }
 +}"""
-        
-        response = client.patch("/files", json={
-            "workspace_name": workspace_name,
-            "patch": patch_content
-        })
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        assert data["data"]["patch_applied"] is True
-        
-        # Verify new file was created
-        response = client.get(f"/files/{workspace_name}/src/main/scala/NewFile.scala")
-        assert response.status_code == 200
-        content = response.json()["data"]["content"]
-        assert "object NewFile" in content
-        assert "Hello from new file!" in content
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
-    def test_patch_files_multiple_files(self):
-        """Test patch that modifies multiple files"""
-        workspace_name = "test-patch-multiple"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create initial files
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/File1.scala",
-            "content": "object File1 { val value = \"old\" }"
-        })
-        assert response.status_code == 200
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/File2.scala", 
-            "content": "object File2 { def method() = {} }"
-        })
-        assert response.status_code == 200
-        
-        # Apply patch to both files
-        patch_content = """--- a/src/main/scala/File1.scala
+PATCH_MULTI_FILE_DIFF = """--- a/src/main/scala/File1.scala
 +++ b/src/main/scala/File1.scala
 @@ -1 +1 @@
 -object File1 { val value = "old" }
@@ -245,33 +190,108 @@ class TestPatchFilesAPI:
 +object File2 { 
 +  def method() = println("updated")
 +}"""
+
+PATCH_MULTI_HUNK_SCALA = """object Test {
+  val x = 1
+  val y = 2
+  
+  def method1() = {
+    println("method1")
+  }
+  
+  def method2() = {
+    println("method2")
+  }
+}"""
+
+PATCH_MULTI_HUNK_DIFF = """--- a/src/main/scala/Test.scala
++++ b/src/main/scala/Test.scala
+@@ -1,4 +1,4 @@
+ object Test {
+-  val x = 1
++  val x = 10
+   val y = 2
+   
+@@ -8,5 +8,5 @@
+   }
+   
+   def method2() = {
+-    println("method2")
++    println("updated method2")
+   }
+ }"""
+
+# seed files, patch, files patched, hunks applied to the first file (or None),
+# and (path, must contain, must not contain) checks on the result
+PATCH_CASES = [
+    pytest.param(
+        [("src/main/scala/Test.scala", PATCH_TEST_SCALA)],
+        PATCH_TEST_SCALA_DIFF, 1, None,
+        [("src/main/scala/Test.scala", ["Hello, Patched!"], ["Hello, World!"])],
+        id="modify_file"
+    ),
+    pytest.param(
+        [],
+        PATCH_NEW_FILE_DIFF, 1, None,
+        [("src/main/scala/NewFile.scala", ["object NewFile", "Hello from new file!"], [])],
+        id="create_new_file"
+    ),
+    pytest.param(
+        [
+            ("src/main/scala/File1.scala", "object File1 { val value = \"old\" }"),
+            ("src/main/scala/File2.scala", "object File2 { def method() = {} }"),
+        ],
+        PATCH_MULTI_FILE_DIFF, 2, None,
+        [
+            ("src/main/scala/File1.scala", ['val value = "new"'], []),
+            ("src/main/scala/File2.scala", ['println("updated")'], []),
+        ],
+        id="multiple_files"
+    ),
+    pytest.param(
+        [("src/main/scala/Test.scala", PATCH_MULTI_HUNK_SCALA)],
+        PATCH_MULTI_HUNK_DIFF, 1, 2,
+        [("src/main/scala/Test.scala", ["val x = 10", "updated method2"], [])],
+        id="multiple_hunks_same_file"
+    ),
+]
+
+
+class TestPatchFilesAPI:
+    """Test the PATCH /files endpoint for git diff functionality"""
+
+    @pytest.mark.parametrize("seed,patch_content,n_files,hunks,checks", PATCH_CASES)
+    def test_patch_files_apply(self, client, workspace, workspace_root, seed, patch_content, n_files, hunks, checks):
+        """Seed a workspace, apply a patch and check the resulting files"""
+        # Seed on disk directly; only the PATCH endpoint is under test
+        for path, content in seed:
+            file_path = workspace_root / path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content)
         
         response = client.patch("/files", json={
-            "workspace_name": workspace_name,
+            "workspace_name": workspace,
             "patch": patch_content
         })
         
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
-        assert data["data"]["results"]["total_files"] == 2
-        assert data["data"]["results"]["successful_files"] == 2
-        
-        # Verify both files were modified
-        response = client.get(f"/files/{workspace_name}/src/main/scala/File1.scala")
-        assert response.status_code == 200
-        content1 = response.json()["data"]["content"]
-        assert 'val value = "new"' in content1
-        
-        response = client.get(f"/files/{workspace_name}/src/main/scala/File2.scala")
-        assert response.status_code == 200
-        content2 = response.json()["data"]["content"]
-        assert 'println("updated")' in content2
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
+        assert data["data"]["patch_applied"] is True
+        results = data["data"]["results"]
+        assert results["total_files"] == n_files
+        assert results["successful_files"] == n_files
+        if hunks is not None:
+            assert results["modified_files"][0]["hunks_applied"] == hunks
+        
+        for path, must_contain, must_not_contain in checks:
+            content = (workspace_root / path).read_text()
+            for text in must_contain:
+                assert text in content
+            for text in must_not_contain:
+                assert text not in content
 
-    def test_patch_files_missing_workspace(self):
+    def test_patch_files_missing_workspace(self, client):
         """Test patch application with missing workspace"""
         patch_content = """--- a/test.scala
 +++ b/test.scala
@@ -289,128 +309,26 @@ class TestPatchFilesAPI:
     def test_patch_files_missing_parameters(self):
         """Test patch with missing parameters"""
         # Missing patch content
-        response = client.patch("/files", json={
-            "workspace_name": "test-workspace"
-        })
-        assert response.status_code == 422  # Validation error
+        with pytest.raises(ValidationError):
+            PatchFileRequest(workspace_name="test-workspace")
         
         # Missing workspace name
-        response = client.patch("/files", json={
-            "patch": "some patch content"
-        })
-        assert response.status_code == 422  # Validation error
+        with pytest.raises(ValidationError):
+            PatchFileRequest(patch="some patch content")
 
-    def test_patch_files_empty_patch(self):
+    def test_patch_files_empty_patch(self, client):
         """Test patch with empty content"""
-        workspace_name = "test-empty-patch"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
+        workspace_name = "test-workspace"
         
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Apply empty patch
+        # End to end: FastAPI turns the validator's error into a 422
         response = client.patch("/files", json={
             "workspace_name": workspace_name,
             "patch": ""
         })
         
         assert response.status_code == 422  # Should fail validation for empty patch
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
     def test_patch_files_whitespace_only_patch(self):
         """Test patch with whitespace-only content"""
-        workspace_name = "test-whitespace-patch"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Apply whitespace-only patch
-        response = client.patch("/files", json={
-            "workspace_name": workspace_name,
-            "patch": "   \n\t  "
-        })
-        
-        assert response.status_code == 422  # Should fail validation for whitespace-only patch
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
-
-    def test_patch_files_multiple_hunks_same_file(self):
-        """Test patch with multiple hunks in the same file"""
-        workspace_name = "test-multi-hunk"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create initial file
-        initial_content = """object Test {
-  val x = 1
-  val y = 2
-  
-  def method1() = {
-    println("method1")
-  }
-  
-  def method2() = {
-    println("method2")
-  }
-}"""
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/Test.scala",
-            "content": initial_content
-        })
-        assert response.status_code == 200
-        
-        # Apply patch with multiple hunks
-        patch_content = """--- a/src/main/scala/Test.scala
-+++ b/src/main/scala/Test.scala
-@@ -1,4 +1,4 @@
- object Test {
--  val x = 1
-+  val x = 10
-   val y = 2
-   
-@@ -8,5 +8,5 @@
-   }
-   
-   def method2() = {
--    println("method2")
-+    println("updated method2")
-   }
- }"""
-        
-        response = client.patch("/files", json={
-            "workspace_name": workspace_name,
-            "patch": patch_content
-        })
-        
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        assert data["data"]["results"]["modified_files"][0]["hunks_applied"] == 2
-        
-        # Verify both hunks were applied
-        response = client.get(f"/files/{workspace_name}/src/main/scala/Test.scala")
-        assert response.status_code == 200
-        content = response.json()["data"]["content"]
-        assert "val x = 10" in content
-        assert "updated method2" in content
-        # Note: Multiple hunk application may have issues with overlapping content
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
\ No newline at end of file
+        with pytest.raises(ValidationError, match="Patch content cannot be empty"):
+            PatchFileRequest(workspace_name="test-workspace", patch="   \n\t  ")
@@ -1,29 +1,129 @@
 import pytest
 import asyncio
-import tempfile
-from pathlib import Path
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
+import uuid
+from unittest.mock import Mock, AsyncMock
 
-from scala_runner.sbt_runner import SBTRunner
+from scala_runner.sbt_runner import READ_CHUNK_SIZE, SBTRunner
 
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for testing"""
-    temp_path = Path(tempfile.mkdtemp())
-    yield temp_path
-    # Cleanup
-    if temp_path.exists():
-        import shutil
-        shutil.rmtree(temp_path)
+@pytest.fixture(scope="session")
+def tmp_root(tmp_path_factory):
+    """One temp root per session; pytest prunes old tmp_path_factory dirs itself"""
+    return tmp_path_factory.mktemp("sbt")
 
 
 @pytest.fixture
+def workspace_path(tmp_root):
+    """Fresh, existing workspace directory for one test"""
+    path = tmp_root / f"ws-{uuid.uuid4().hex}"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture(scope="session")
 def sbt_runner():
-    """Create an SBTRunner instance for testing"""
+    """Shared SBTRunner; tests that change its settings use monkeypatch"""
     return SBTRunner()
 
 
+@pytest.fixture
+def mock_subprocess(sbt_runner, monkeypatch):
+    """Stub launcher injected into the shared runner in place of asyncio.create_subprocess_exec"""
+    stub = AsyncMock()
+    monkeypatch.setattr(sbt_runner, "subprocess_exec", stub)
+    return stub
+
+
+class FakeStream:
+    """In-memory stand-in for asyncio.StreamReader.
+
+    Serves data one chunk at a time, like a pipe, through read, readline and
+    async iteration, so tests don't depend on which of them the runner uses.
+    """
+
+    def __init__(self, *chunks):
+        self._chunks = [bytearray(c) for c in chunks if c]
+
+    async def read(self, n=-1):
+        if not self._chunks:
+            return b""
+        chunk = self._chunks[0]
+        if n < 0 or n >= len(chunk):
+            self._chunks.pop(0)
+            return bytes(chunk)
+        data = bytes(chunk[:n])
+        del chunk[:n]
+        return data
+
+    async def readline(self):
+        line = bytearray()
+        while self._chunks and not line.endswith(b"\n"):
+            chunk = self._chunks[0]
+            end = chunk.find(b"\n")
+            line += await self.read(end + 1 if end >= 0 else -1)
+        return bytes(line)
+
+    def at_eof(self):
+        return not self._chunks
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        line = await self.readline()
+        if not line:
+            raise StopAsyncIteration
+        return line
+
+
+def _mk_proc(stdout=b"", stderr=b"", rc=0):
+    """Fake docker process as returned by asyncio.create_subprocess_exec.
+
+    stdout and stderr are bytes, or lists of bytes to deliver as separate chunks.
+    """
+    return Mock(
+        stdout=FakeStream(*stdout) if isinstance(stdout, list) else FakeStream(stdout),
+        stderr=FakeStream(*stderr) if isinstance(stderr, list) else FakeStream(stderr),
+        returncode=rc,
+        wait=AsyncMock(return_value=rc),
+        terminate=Mock(),
+    )
+
+
+def _hung_proc():
+    """Fake docker process that never exits on its own; terminate() ends it"""
+    stopped = asyncio.Event()
+    process = _mk_proc(rc=-15)
+    process.returncode = None
+    
+    async def _wait():
+        await stopped.wait()
+        return process.returncode
+    
+    process.wait = AsyncMock(side_effect=_wait)
+    process.terminate = Mock(side_effect=stopped.set)
+    return process
+
+
+# runner method, positional args, keyword args, reported command, trailing sbt argv
+RUN_CASES = [
+    pytest.param("run_sbt_compile", (), {}, "compile", ["compile"], id="compile"),
+    pytest.param("run_sbt_test", (), {}, "test", ["test"], id="test"),
+    pytest.param("run_sbt_clean", (), {}, "clean", ["clean"], id="clean"),
+    pytest.param("run_sbt_run", (), {}, "run", ["run"], id="run_default"),
+    pytest.param(
+        "run_sbt_run", (), {"main_class": "com.example.Main"},
+        "runMain com.example.Main", ["runMain com.example.Main"],
+        id="run_main_class"
+    ),
+    pytest.param(
+        "run_sbt_command", ("clean compile",), {},
+        "clean compile", ["clean", "compile"],
+        id="compound_command"
+    ),
+]
+
+
 class TestSBTRunner:
     """Test suite for SBTRunner"""
 
@@ -54,6 +154,7 @@ class TestSBTRunner:
         assert sbt_runner._is_valid_sbt_command("stage")
         assert sbt_runner._is_valid_sbt_command("docker")
         assert sbt_runner._is_valid_sbt_command("dockerize")
+        assert sbt_runner._is_valid_sbt_command("pullRemoteCache compile pushRemoteCache")
         
         # Invalid commands
         assert not sbt_runner._is_valid_sbt_command("rm -rf /")
@@ -62,18 +163,11 @@ class TestSBTRunner:
         assert not sbt_runner._is_valid_sbt_command("")
         assert not sbt_runner._is_valid_sbt_command("invalid_command")
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_command_success(self, mock_subprocess, sbt_runner, temp_dir):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_run_sbt_command_success(self, mock_subprocess, sbt_runner, workspace_path):
         """Test successful SBT command execution"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
         # Mock successful process
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"[success] Total time: 2 s")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
+        mock_process = _mk_proc(stdout=b"[success] Total time: 2 s")
         mock_subprocess.return_value = mock_process
         
         result = await sbt_runner.run_sbt_command(str(workspace_path), "compile")
@@ -91,19 +185,11 @@ class TestSBTRunner:
         assert f"-v{workspace_path}:/workspace" in args  # Volume mapping with -v prefix
         assert sbt_runner.image in args
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_command_failure(self, mock_subprocess, sbt_runner, temp_dir):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_run_sbt_command_failure(self, mock_subprocess, sbt_runner, workspace_path):
         """Test SBT command execution failure"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
         # Mock failed process
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"[error] Compilation failed")
-        mock_process.stderr.read = AsyncMock(return_value=b"Error: missing semicolon")
-        mock_process.wait = AsyncMock(return_value=1)
-        mock_subprocess.return_value = mock_process
+        mock_subprocess.return_value = _mk_proc(stdout=b"[error] Compilation failed", stderr=b"Error: missing semicolon", rc=1)
         
         result = await sbt_runner.run_sbt_command(str(workspace_path), "compile")
         
@@ -112,148 +198,63 @@ class TestSBTRunner:
         assert "[error] Compilation failed" in result["output"]
         assert "Error: missing semicolon" in result["stderr"]
 
-    @pytest.mark.asyncio
-    async def test_run_sbt_command_invalid_command(self, sbt_runner, temp_dir):
-        """Test SBT command execution with invalid command"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_run_sbt_command_chunked_output(self, mock_subprocess, sbt_runner, workspace_path):
+        """Test output split over several pipe reads is reassembled in order"""
+        big = b"x" * (2 * READ_CHUNK_SIZE + 1)
+        mock_subprocess.return_value = _mk_proc(stdout=[b"[info] one\n", b"[info] two\n", big])
+        
+        result = await sbt_runner.run_sbt_command(str(workspace_path), "compile")
         
+        assert result["output"] == "[info] one\n[info] two\n" + big.decode()
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_run_sbt_command_invalid_command(self, sbt_runner, workspace_path):
+        """Test SBT command execution with invalid command"""
         with pytest.raises(ValueError, match="Invalid or potentially dangerous SBT command"):
             await sbt_runner.run_sbt_command(str(workspace_path), "rm -rf /")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_run_sbt_command_nonexistent_workspace(self, sbt_runner):
         """Test SBT command execution with non-existent workspace"""
         with pytest.raises(ValueError, match="Workspace path does not exist"):
             await sbt_runner.run_sbt_command("/nonexistent/path", "compile")
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_command_timeout(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT command execution timeout"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock process that hangs
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(side_effect=asyncio.TimeoutError())
-        mock_process.terminate = Mock()
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.timeout(10)
+    async def test_run_sbt_command_timeout(self, mock_subprocess, sbt_runner, workspace_path, monkeypatch):
+        """Test a hung SBT command is cut off at the runner's default timeout"""
+        monkeypatch.setattr(sbt_runner, "timeout", 0.05)
+        mock_process = _hung_proc()
         mock_subprocess.return_value = mock_process
         
-        # Set a short timeout for testing
-        sbt_runner.timeout = 1
-        
         result = await sbt_runner.run_sbt_command(str(workspace_path), "compile")
         
         assert result["status"] == "timeout"
         assert result["command"] == "compile"
-        assert "Command timed out" in result["output"]
+        assert "Command timed out after 0.05 seconds" in result["output"]
         mock_process.terminate.assert_called_once()
+        # The wait cancelled on expiry, then the one reaping the terminated process
+        assert mock_process.wait.await_count == 2
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_compile(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT compile command"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful compilation
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"[info] Compiling 1 Scala source to target/scala-3.3.1/classes...")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
-        
-        result = await sbt_runner.run_sbt_compile(str(workspace_path))
-        
-        assert result["status"] == "success"
-        assert result["command"] == "compile"
-
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_test(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT test command"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful test run
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"[info] All tests passed")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
-        
-        result = await sbt_runner.run_sbt_test(str(workspace_path))
-        
-        assert result["status"] == "success"
-        assert result["command"] == "test"
-
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_clean(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT clean command"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful clean
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"[success] Total time: 0 s")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.parametrize("method,args,kwargs,expected_command,sbt_args", RUN_CASES)
+    async def test_run_sbt_method(self, mock_subprocess, sbt_runner, workspace_path,
+                                  method, args, kwargs, expected_command, sbt_args):
+        """Test each runner entry point issues the expected SBT command"""
+        mock_subprocess.return_value = _mk_proc(stdout=b"[success] Total time: 1 s")
         
-        result = await sbt_runner.run_sbt_clean(str(workspace_path))
+        result = await getattr(sbt_runner, method)(str(workspace_path), *args, **kwargs)
         
         assert result["status"] == "success"
-        assert result["command"] == "clean"
-
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_run_with_main_class(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT run command with main class"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful run
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"Hello, World!")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
-        
-        result = await sbt_runner.run_sbt_run(str(workspace_path), main_class="com.example.Main")
-        
-        assert result["status"] == "success"
-        assert result["command"] == 'runMain com.example.Main'
-
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_run_sbt_run_default(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT run command without main class"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful run
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"Hello, World!")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
-        
-        result = await sbt_runner.run_sbt_run(str(workspace_path))
-        
-        assert result["status"] == "success"
-        assert result["command"] == "run"
+        assert result["command"] == expected_command
+        mock_subprocess.assert_called_once()
+        argv = list(mock_subprocess.call_args[0])
+        assert argv[-len(sbt_args) - 1:] == ["sbt", *sbt_args]
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_get_sbt_project_info(self, mock_subprocess, sbt_runner, temp_dir):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_get_sbt_project_info(self, mock_subprocess, sbt_runner, workspace_path):
         """Test getting SBT project information"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
         # Create build.sbt file that the method expects
         build_sbt = workspace_path / "build.sbt"
         build_sbt.write_text('name := "Test Project"')
@@ -268,11 +269,7 @@ class TestSBTRunner:
 [info]     - sbt.plugins.IvyPlugin
 [info]     - sbt.plugins.JvmPlugin"""
         
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=project_info.encode())
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
+        mock_subprocess.return_value = _mk_proc(stdout=project_info.encode())
         
         result = await sbt_runner.get_project_info(str(workspace_path))
         
@@ -280,19 +277,11 @@ class TestSBTRunner:
         assert result["is_sbt_project"] is True
         assert result["has_build_sbt"] is True
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_docker_command_construction(self, mock_subprocess, sbt_runner, temp_dir):
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_docker_command_construction(self, mock_subprocess, sbt_runner, workspace_path):
         """Test Docker command construction"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
         # Mock successful process
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"success")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
-        mock_subprocess.return_value = mock_process
+        mock_subprocess.return_value = _mk_proc(stdout=b"success")
         
         await sbt_runner.run_sbt_command(str(workspace_path), "compile")
         
@@ -300,15 +289,6 @@ class TestSBTRunner:
         mock_subprocess.assert_called_once()
         args = mock_subprocess.call_args[0]
         
-        expected_args = [
-            "docker", "run", "--rm", "-it",
-            f"-v{workspace_path}:/workspace",
-            "-w", "/workspace",
-            "--user", f"{os.getuid()}:{os.getgid()}",
-            sbt_runner.image,
-            "sbt", "compile"
-        ]
-        
         # Check key components are present
         assert "docker" in args
         assert "run" in args
@@ -318,52 +298,101 @@ class TestSBTRunner:
         assert "sbt" in args
         assert "compile" in args
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_custom_timeout(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test custom timeout for SBT commands"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock process that hangs
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(side_effect=asyncio.TimeoutError())
-        mock_process.terminate = Mock()
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_persistent_server_reuses_container(self, workspace_path):
+        """Test persistent server mode starts one container and execs the thin client into it"""
+        mock_subprocess = AsyncMock(side_effect=lambda *args, **kwargs: _mk_proc(stdout=b"[success]"))
+        sbt_runner = SBTRunner(persistent_server=True, subprocess_exec=mock_subprocess)
+        
+        first = await sbt_runner.run_sbt_command(workspace_path, "compile")
+        second = await sbt_runner.run_sbt_command(workspace_path, "clean compile")
+        assert first["status"] == "success"
+        assert second["status"] == "success"
+        
+        calls = [c[0] for c in mock_subprocess.call_args_list]
+        # rm stale container, start container, then one exec per command
+        assert len(calls) == 4
+        assert calls[0][:3] == ("docker", "rm", "-f")
+        assert calls[1][:3] == ("docker", "run", "-dit")
+        container_name = calls[1][calls[1].index("--name") + 1]
+        assert calls[2] == ("docker", "exec", "-w", "/workspace", container_name, "sbt", "--client", "compile")
+        assert calls[3][-1] == "clean; compile"
+        
+        assert await sbt_runner.stop_all_servers() == 1
+        assert mock_subprocess.call_args[0] == ("docker", "rm", "-f", container_name)
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_persistent_server_concurrent_first_calls(self, workspace_path):
+        """Test concurrent first commands for a workspace share one server container"""
+        async def _launch(*args, **kwargs):
+            # Yield like a real process start so the two commands interleave
+            await asyncio.sleep(0)
+            return _mk_proc(stdout=b"[success]")
+        
+        mock_subprocess = AsyncMock(side_effect=_launch)
+        sbt_runner = SBTRunner(persistent_server=True, subprocess_exec=mock_subprocess)
+        
+        results = await asyncio.gather(
+            sbt_runner.run_sbt_command(workspace_path, "compile"),
+            sbt_runner.run_sbt_command(workspace_path, "test"),
+        )
+        assert [r["status"] for r in results] == ["success", "success"]
+        
+        calls = [c[0] for c in mock_subprocess.call_args_list]
+        assert sum(1 for c in calls if c[:3] == ("docker", "rm", "-f")) == 1
+        assert sum(1 for c in calls if c[:3] == ("docker", "run", "-dit")) == 1
+        
+        assert await sbt_runner.stop_server(workspace_path) is True
+        assert await sbt_runner.stop_server(workspace_path) is False
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_stream_sbt_command(self, mock_subprocess, sbt_runner, workspace_path):
+        """Test streamed output arrives line by line and ends with the exit code"""
+        mock_subprocess.return_value = _mk_proc(stdout=[
+            b"[info] compiling 1 ",
+            b"Scala source\n[success] Total time: 2 s\n",
+        ])
+        
+        lines = await sbt_runner.stream_sbt_command(workspace_path, "compile")
+        output = [line async for line in lines]
+        
+        assert output == [
+            "[info] compiling 1 Scala source\n",
+            "[success] Total time: 2 s\n",
+            "[exit] 0\n",
+        ]
+        assert mock_subprocess.call_args[1]["stderr"] == asyncio.subprocess.STDOUT
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_stream_sbt_command_invalid_command(self, sbt_runner, workspace_path):
+        """Test invalid commands are rejected before any process starts"""
+        with pytest.raises(ValueError, match="Invalid or potentially dangerous"):
+            await sbt_runner.stream_sbt_command(workspace_path, "rm -rf /")
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_stream_sbt_command_closed_early(self, mock_subprocess, sbt_runner, workspace_path):
+        """Test closing the stream early terminates the still-running process"""
+        mock_process = _mk_proc(stdout=b"[success] Total time: 2 s\n[info] still running\n", rc=-15)
+        mock_process.returncode = None
         mock_subprocess.return_value = mock_process
         
-        # Test with custom timeout
-        result = await sbt_runner.run_sbt_command(str(workspace_path), "compile", timeout=2)
+        lines = await sbt_runner.stream_sbt_command(workspace_path, "compile")
+        async for line in lines:
+            if "[success]" in line:
+                break
+        await lines.aclose()
         
-        assert result["status"] == "timeout"
         mock_process.terminate.assert_called_once()
 
-    @pytest.mark.asyncio
-    @patch('asyncio.create_subprocess_exec')
-    async def test_sbt_command_with_arguments(self, mock_subprocess, sbt_runner, temp_dir):
-        """Test SBT command with additional arguments"""
-        workspace_path = temp_dir / "test-workspace"
-        workspace_path.mkdir(parents=True)
-        
-        # Mock successful process
-        mock_process = Mock()
-        mock_process.stdout.read = AsyncMock(return_value=b"Success")
-        mock_process.stderr.read = AsyncMock(return_value=b"")
-        mock_process.wait = AsyncMock(return_value=0)
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.timeout(10)
+    async def test_custom_timeout(self, mock_subprocess, sbt_runner, workspace_path):
+        """Test a per-call timeout overrides the runner's default"""
+        mock_process = _hung_proc()
         mock_subprocess.return_value = mock_process
         
-        # Test compound command
-        result = await sbt_runner.run_sbt_command(str(workspace_path), "clean compile")
+        result = await sbt_runner.run_sbt_command(str(workspace_path), "compile", timeout=0.05)
         
-        assert result["status"] == "success"
-        
-        # Verify command construction
-        mock_subprocess.assert_called_once()
-        args = mock_subprocess.call_args[0]
-        assert "clean" in args
-        assert "compile" in args
-
-
-# Import os for testing user/group ID
-import os 
\ No newline at end of file
+        assert result["status"] == "timeout"
+        assert "Command timed out after 0.05 seconds" in result["output"]
+        mock_process.terminate.assert_called_once()
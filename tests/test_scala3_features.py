@@ -1,29 +1,10 @@
 import pytest
-from fastapi.testclient import TestClient
-from scala_runner.main import app
-import time
-import random
 
-client = TestClient(app)
+from helpers import assert_all_in
 
-class TestScala3Features:
-    """Test suite for Scala 3.7.1 specific features and functionality"""
 
-    @pytest.mark.integration
-    @pytest.mark.scala3
-    def test_scala3_basic_syntax(self):
-        """Test basic Scala 3 syntax compilation and execution"""
-        workspace_name = f"scala3-basic-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create build.sbt with Scala 3.7.1
-        build_sbt_content = '''
+# Project files written by each test (Scala 3.7.1)
+BUILD_SBT_BASIC = '''\
 scalaVersion := "3.7.1"
 
 name := "scala3-test"
@@ -32,16 +13,8 @@ libraryDependencies ++= Seq(
   "org.scalameta" %% "munit" % "0.7.29" % Test
 )
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "build.sbt",
-            "content": build_sbt_content.strip()
-        })
-        assert response.status_code == 200
-        
-        # Create Scala 3 code with new syntax features
-        scala3_code = '''
+
+SCALA_SRC_BASIC = '''\
 // Top-level definitions (Scala 3 feature)
 type UserId = Long
 type UserName = String
@@ -79,67 +52,14 @@ enum Color(val rgb: Int):
   
   println("Scala 3.7.1 features working!")
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/Scala3Test.scala",
-            "content": scala3_code
-        })
-        assert response.status_code == 200
-        
-        # Compile the Scala 3 project
-        response = client.post("/sbt/compile", json={"workspace_name": workspace_name}, timeout=120)
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        
-        # Run the Scala 3 project
-        response = client.post("/sbt/run-project", json={
-            "workspace_name": workspace_name, 
-            "main_class": "runScala3Test"
-        }, timeout=120)
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        
-        output = data["data"]["output"]
-        assert "User: Alice (alice@example.com)" in output
-        assert "Valid ID: true" in output
-        assert "Color: #FF0000" in output
-        assert "String value: Hello Scala 3!" in output
-        assert "Scala 3.7.1 features working!" in output
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
-    @pytest.mark.integration
-    @pytest.mark.scala3
-    def test_scala3_opaque_types(self):
-        """Test Scala 3 opaque types feature"""
-        workspace_name = f"scala3-opaque-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create build.sbt with Scala 3.7.1
-        build_sbt_content = '''
+
+BUILD_SBT_OPAQUE = '''\
 scalaVersion := "3.7.1"
 name := "scala3-opaque-test"
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "build.sbt",
-            "content": build_sbt_content.strip()
-        })
-        assert response.status_code == 200
-        
-        # Create Scala 3 code with opaque types
-        scala3_code = '''
+
+SCALA_SRC_OPAQUE = '''\
 object OpaqueTypes:
   // Opaque types (Scala 3 feature)
   opaque type Kilometers = Double
@@ -172,62 +92,14 @@ object OpaqueTypes:
   
   println("Opaque types working correctly!")
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/OpaqueTest.scala",
-            "content": scala3_code
-        })
-        assert response.status_code == 200
-        
-        # Compile and run
-        response = client.post("/sbt/compile", json={"workspace_name": workspace_name}, timeout=120)
-        assert response.status_code == 200
-        
-        response = client.post("/sbt/run-project", json={
-            "workspace_name": workspace_name,
-            "main_class": "testOpaqueTypes"
-        }, timeout=120)
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        
-        output = data["data"]["output"]
-        assert "100.0 km" in output and "miles" in output
-        assert "62.1371 miles" in output and "km" in output
-        assert "Opaque types working correctly!" in output
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
-    @pytest.mark.integration
-    @pytest.mark.scala3  
-    def test_scala3_given_using(self):
-        """Test Scala 3 given/using context parameters"""
-        workspace_name = f"scala3-given-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create build.sbt with Scala 3.7.1
-        build_sbt_content = '''
+
+BUILD_SBT_GIVEN = '''\
 scalaVersion := "3.7.1"
 name := "scala3-given-test"
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "build.sbt",
-            "content": build_sbt_content.strip()
-        })
-        assert response.status_code == 200
-        
-        # Create Scala 3 code with given/using
-        scala3_code = '''
+
+SCALA_SRC_GIVEN = '''\
 // Given/using pattern (Scala 3 feature)
 trait Formatter[T]:
   def format(value: T): String
@@ -258,65 +130,14 @@ def showValue[T: Formatter](value: T): String =
   
   println("Given/using working correctly!")
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "src/main/scala/GivenTest.scala",
-            "content": scala3_code
-        })
-        assert response.status_code == 200
-        
-        # Compile and run
-        response = client.post("/sbt/compile", json={"workspace_name": workspace_name}, timeout=120)
-        assert response.status_code == 200
-        
-        response = client.post("/sbt/run-project", json={
-            "workspace_name": workspace_name,
-            "main_class": "testGivenUsing"
-        }, timeout=120)
-        assert response.status_code == 200
-        data = response.json()
-        assert data["status"] == "success"
-        
-        output = data["data"]["output"]
-        assert "Integer: 42" in output
-        assert "String: 'Hello'" in output
-        assert "Double: 3.14" in output
-        assert "Integer: 100" in output
-        assert "String: 'World'" in output
-        assert "Given/using working correctly!" in output
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}")
 
-    @pytest.mark.integration
-    @pytest.mark.scala3
-    def test_scala3_new_control_syntax(self):
-        """Test Scala 3 new control syntax without braces"""
-        workspace_name = f"scala3-control-{int(time.time()*1000)}-{random.randint(1000, 9999)}"
-        
-        # Clean up first
-        client.delete(f"/workspaces/{workspace_name}")
-        
-        # Create workspace
-        response = client.post("/workspaces", json={"name": workspace_name})
-        assert response.status_code == 200
-        
-        # Create build.sbt with Scala 3.7.1
-        build_sbt_content = '''
+
+BUILD_SBT_CONTROL = '''\
 scalaVersion := "3.7.1"
 name := "scala3-control-test"
 '''
-        
-        response = client.put("/files", json={
-            "workspace_name": workspace_name,
-            "file_path": "build.sbt",
-            "content": build_sbt_content.strip()
-        })
-        assert response.status_code == 200
-        
-        # Create Scala 3 code with new control syntax
-        scala3_code = '''
+
+SCALA_SRC_CONTROL = '''\
 // New control syntax without braces (Scala 3)
 def processNumbers(numbers: List[Int]): List[String] =
   numbers.map: n =>
@@ -365,40 +186,154 @@ def analyzeValue(value: Any): String = value match
   
   println("New control syntax working correctly!")
 '''
+
+
+class TestScala3Features:
+    """Test suite for Scala 3.7.1 specific features and functionality"""
+
+    @pytest.mark.integration
+    @pytest.mark.scala3
+    @pytest.mark.xdist_group("test_scala3_basic_syntax")
+    def test_scala3_basic_syntax(self, client, make_workspace):
+        """Test basic Scala 3 syntax compilation and execution"""
+        workspace_name = make_workspace("scala3-basic")
+        
+        # Write the build and the source in one request
+        response = client.put("/files/batch", json={
+            "workspace_name": workspace_name,
+            "files": [
+                {"file_path": "build.sbt", "content": BUILD_SBT_BASIC},
+                {"file_path": "src/main/scala/Scala3Test.scala", "content": SCALA_SRC_BASIC},
+            ]
+        })
+        assert response.status_code == 200
+        
+        # Run the Scala 3 project; runMain compiles first, in the same sbt JVM
+        response = client.post("/sbt/run-project", json={
+            "workspace_name": workspace_name, 
+            "main_class": "runScala3Test"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
         
-        response = client.put("/files", json={
+        output = data["data"]["output"]
+        assert_all_in(output, [
+            "User: Alice (alice@example.com)",
+            "Valid ID: true",
+            "Color: #FF0000",
+            "String value: Hello Scala 3!",
+            "Scala 3.7.1 features working!",
+        ])
+
+    @pytest.mark.integration
+    @pytest.mark.scala3
+    @pytest.mark.xdist_group("test_scala3_opaque_types")
+    def test_scala3_opaque_types(self, client, make_workspace):
+        """Test Scala 3 opaque types feature"""
+        workspace_name = make_workspace("scala3-opaque")
+        
+        # Write the build and the source in one request
+        response = client.put("/files/batch", json={
+            "workspace_name": workspace_name,
+            "files": [
+                {"file_path": "build.sbt", "content": BUILD_SBT_OPAQUE},
+                {"file_path": "src/main/scala/OpaqueTest.scala", "content": SCALA_SRC_OPAQUE},
+            ]
+        })
+        assert response.status_code == 200
+        
+        # Run; runMain compiles first, in the same sbt JVM
+        response = client.post("/sbt/run-project", json={
+            "workspace_name": workspace_name,
+            "main_class": "testOpaqueTypes"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        
+        output = data["data"]["output"]
+        assert_all_in(output, [
+            "100.0 km",
+            "62.1371 miles",
+            "Opaque types working correctly!",
+        ])
+
+    @pytest.mark.integration
+    @pytest.mark.scala3  
+    @pytest.mark.xdist_group("test_scala3_given_using")
+    def test_scala3_given_using(self, client, make_workspace):
+        """Test Scala 3 given/using context parameters"""
+        workspace_name = make_workspace("scala3-given")
+        
+        # Write the build and the source in one request
+        response = client.put("/files/batch", json={
             "workspace_name": workspace_name,
-            "file_path": "src/main/scala/ControlSyntaxTest.scala",
-            "content": scala3_code
+            "files": [
+                {"file_path": "build.sbt", "content": BUILD_SBT_GIVEN},
+                {"file_path": "src/main/scala/GivenTest.scala", "content": SCALA_SRC_GIVEN},
+            ]
         })
         assert response.status_code == 200
         
-        # Compile and run
-        response = client.post("/sbt/compile", json={"workspace_name": workspace_name}, timeout=120)
+        # Run; runMain compiles first, in the same sbt JVM
+        response = client.post("/sbt/run-project", json={
+            "workspace_name": workspace_name,
+            "main_class": "testGivenUsing"
+        })
         assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
         
+        output = data["data"]["output"]
+        assert_all_in(output, [
+            "Integer: 42",
+            "String: 'Hello'",
+            "Double: 3.14",
+            "Integer: 100",
+            "String: 'World'",
+            "Given/using working correctly!",
+        ])
+
+    @pytest.mark.integration
+    @pytest.mark.scala3
+    @pytest.mark.xdist_group("test_scala3_new_control_syntax")
+    def test_scala3_new_control_syntax(self, client, make_workspace):
+        """Test Scala 3 new control syntax without braces"""
+        workspace_name = make_workspace("scala3-control")
+        
+        # Write the build and the source in one request
+        response = client.put("/files/batch", json={
+            "workspace_name": workspace_name,
+            "files": [
+                {"file_path": "build.sbt", "content": BUILD_SBT_CONTROL},
+                {"file_path": "src/main/scala/ControlSyntaxTest.scala", "content": SCALA_SRC_CONTROL},
+            ]
+        })
+        assert response.status_code == 200
+        
+        # Run; runMain compiles first, in the same sbt JVM
         response = client.post("/sbt/run-project", json={
             "workspace_name": workspace_name,
             "main_class": "testNewControlSyntax"
-        }, timeout=120)
+        })
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
         
         output = data["data"]["output"]
-        assert "Negative: -2" in output
-        assert "Negative: -1" in output
-        assert "Zero" in output
-        assert "Positive: 1" in output
-        assert "Positive: 2" in output
-        assert "Positive: 3" in output
-        assert "Sum: 3" in output
-        assert "Condition is true" in output
-        assert "Condition is false" in output
-        assert "Positive integer: 42" in output
-        assert "Negative integer: -10" in output
-        assert "String: hello" in output
-        assert "New control syntax working correctly!" in output
-        
-        # Clean up
-        client.delete(f"/workspaces/{workspace_name}") 
\ No newline at end of file
+        assert_all_in(output, [
+            "Negative: -2",
+            "Negative: -1",
+            "Zero",
+            "Positive: 1",
+            "Positive: 2",
+            "Positive: 3",
+            "Sum: 3",
+            "Condition is true",
+            "Condition is false",
+            "Positive integer: 42",
+            "Negative integer: -10",
+            "String: hello",
+            "New control syntax working correctly!",
+        ])
@@ -35,7 +35,7 @@ class TestFileSystemEdgeCases:
 
 
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_directory_instead_of_file(self):
         """Test applying patch when target is a directory"""
         workspace_name = "directory-test"
@@ -59,7 +59,7 @@ def value = "modified"
         assert result["patch_applied"] is False
         assert result["results"]["successful_files"] == 0
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_disk_space_simulation(self):
         """Test applying patch when disk space is limited (simulated)"""
         workspace_name = "disk-space-test"
@@ -86,7 +86,7 @@ small content
         # Should handle large content gracefully
         assert isinstance(result["patch_applied"], bool)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_invalid_file_path(self):
         """Test applying patch with invalid file paths"""
         workspace_name = "invalid-path-test"
@@ -134,7 +134,7 @@ class TestContentEdgeCases:
         """Clean up test environment"""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_binary_file(self):
         """Test applying patch to binary file"""
         workspace_name = "binary-test"
@@ -162,7 +162,68 @@ class TestContentEdgeCases:
         # Should handle binary files gracefully (likely fail)
         assert isinstance(result["patch_applied"], bool)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_apply_patch_exact_match_keeps_other_bytes(self):
+        """Test an exact match patches a non-UTF-8 file without touching the other bytes"""
+        workspace_name = "raw-bytes-test"
+        await self.workspace_manager.create_workspace(workspace_name)
+
+        file_path = "latin1.scala"
+        full_path = self.workspace_manager.get_workspace_path(workspace_name) / file_path
+        full_path.write_bytes(b'val name = "caf\xe9"\r\nval n = 1\r\n')
+
+        patch_content = f"""{file_path}
+<<<<<<< SEARCH
+val n = 1
+=======
+val n = 2
+>>>>>>> REPLACE"""
+
+        result = await self.workspace_manager.apply_patch(workspace_name, patch_content)
+
+        assert result["patch_applied"] is True
+        assert full_path.read_bytes() == b'val name = "caf\xe9"\r\nval n = 2\r\n'
+
+    @pytest.mark.asyncio(loop_scope="session")
+    @pytest.mark.parametrize("search, replace, expected", [
+        pytest.param(
+            "val n = 1", "val n = 2\nval m = 3",
+            b"object A {\r\nval n = 2\r\nval m = 3\r\n}\r\n",
+            id="multi_line_replace",
+        ),
+        pytest.param(
+            "object A {\nval n = 1", "object A {\nval n = 2",
+            b"object A {\r\nval n = 2\r\n}\r\n",
+            id="multi_line_search",
+        ),
+        pytest.param(
+            "object  A {\nval n =  1", "object A {\nval n = 2",
+            b"object A {\r\nval n = 2\r\n}\r\n",
+            id="normalized_match",
+        ),
+    ])
+    async def test_apply_patch_keeps_crlf_line_endings(self, search, replace, expected):
+        """Test patching a CRLF file writes CRLF throughout, whichever matcher applies"""
+        workspace_name = "crlf-test"
+        await self.workspace_manager.create_workspace(workspace_name)
+
+        file_path = "crlf.scala"
+        full_path = self.workspace_manager.get_workspace_path(workspace_name) / file_path
+        full_path.write_bytes(b"object A {\r\nval n = 1\r\n}\r\n")
+
+        patch_content = f"""{file_path}
+<<<<<<< SEARCH
+{search}
+=======
+{replace}
+>>>>>>> REPLACE"""
+
+        result = await self.workspace_manager.apply_patch(workspace_name, patch_content)
+
+        assert result["patch_applied"] is True
+        assert full_path.read_bytes() == expected
+
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_null_bytes(self):
         """Test applying patch with null bytes in content"""
         workspace_name = "null-bytes-test"
@@ -189,7 +250,7 @@ clean content
         # Should handle null bytes appropriately
         assert isinstance(result["patch_applied"], bool)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_different_encodings(self):
         """Test applying patch with different text encodings"""
         workspace_name = "encoding-test"
@@ -223,7 +284,7 @@ val emoji = "🔥💯🎯"
         assert "🔥💯🎯" in updated_content["content"]
         assert "你好世界" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_extremely_long_lines(self):
         """Test applying patch with extremely long lines"""
         workspace_name = "long-lines-test"
@@ -256,7 +317,7 @@ val extremely_long = "{new_long_string}"
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert new_long_string in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_empty_file(self):
         """Test applying patch to completely empty file"""
         workspace_name = "empty-test"
@@ -281,7 +342,7 @@ object NewContent {{
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "NewContent" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_whitespace_only_file(self):
         """Test applying patch to file with only whitespace"""
         workspace_name = "whitespace-test"
@@ -321,7 +382,7 @@ class TestMatchingEdgeCases:
         """Clean up test environment"""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_multiple_identical_matches(self):
         """Test applying patch when search content appears multiple times"""
         workspace_name = "multiple-matches-test"
@@ -353,7 +414,7 @@ def method1() = "unique"
         assert content.count("unique") == 1
         assert content.count("duplicate") == 2
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_overlapping_matches(self):
         """Test applying patch with overlapping search patterns"""
         workspace_name = "overlapping-test"
@@ -382,7 +443,7 @@ xyz
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "xyz" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_regex_special_characters(self):
         """Test applying patch with regex special characters in search"""
         workspace_name = "regex-test"
@@ -487,7 +548,7 @@ class TestConcurrencyEdgeCases:
         """Clean up test environment"""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_concurrent_patch_applications(self):
         """Test applying multiple patches concurrently"""
         workspace_name = "concurrent-test"
@@ -523,7 +584,7 @@ def value = "modified{index}"
                 pytest.fail(f"Concurrent patch application failed: {result}")
             assert result["patch_applied"] is True
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_patch_application_with_file_modification_during_operation(self):
         """Test patch application when file is modified during operation"""
         workspace_name = "modification-test"
@@ -558,7 +619,7 @@ def value = "modified"
         # Should handle concurrent modification gracefully
         assert isinstance(result["patch_applied"], bool)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_workspace_operations_during_patch_application(self):
         """Test workspace operations during patch application"""
         workspace_name = "workspace-ops-test"
@@ -609,7 +670,7 @@ class TestErrorRecoveryEdgeCases:
         """Clean up test environment"""
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_patch_application_with_partial_failure(self):
         """Test patch application with partial failure in multi-file patch"""
         workspace_name = "partial-failure-test"
@@ -641,7 +702,7 @@ def value = "modified"
         assert result["results"]["successful_files"] == 1
         assert result["patch_applied"] is True  # At least one succeeded
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_patch_application_with_corrupted_workspace(self):
         """Test patch application with corrupted workspace"""
         workspace_name = "corrupted-test"
@@ -673,7 +734,7 @@ new content
             # Or it properly reported the error
             assert "error" in result
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_patch_application_with_memory_pressure(self):
         """Test patch application under memory pressure (simulated)"""
         workspace_name = "memory-test"
@@ -697,7 +758,7 @@ small
         # Should handle large content gracefully
         assert isinstance(result["patch_applied"], bool)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_patch_application_with_interrupted_operation(self):
         """Test patch application with simulated interruption"""
         workspace_name = "interrupt-test"
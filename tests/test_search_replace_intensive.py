@@ -15,9 +15,20 @@ import stat
 import concurrent.futures
 import uuid
 
+from scala_runner import workspace_manager as workspace_manager_module
 from scala_runner.workspace_manager import WorkspaceManager
 
 
+@pytest.fixture(params=["rapidfuzz", "difflib"])
+def similarity_backend(request, monkeypatch):
+    """Run a test against each _similarity backend; difflib is forced by hiding rapidfuzz"""
+    if request.param == "rapidfuzz":
+        pytest.importorskip("rapidfuzz")
+    else:
+        monkeypatch.setattr(workspace_manager_module, "fuzz", None)
+    return request.param
+
+
 class TestSearchReplacePatchParsing:
     """Test search-replace patch parsing functionality"""
 
@@ -173,6 +184,23 @@ println("Clean output")
         assert '<<<<<<< This is not a real marker' in patches[0]["search"]
         assert "Updated message" in patches[0]["replace"]
 
+    def test_parse_patch_markers_must_start_line(self):
+        """Test indented markers count but marker text later in a line does not"""
+        patch_content = """  Test.scala
+  <<<<<<< SEARCH
+val same = a ======= b
+  =======
+val same = a == b
+  >>>>>>> REPLACE"""
+
+        patches = self.workspace_manager._parse_search_replace_format(patch_content)
+
+        assert patches == [{
+            "file_path": "Test.scala",
+            "search": "val same = a ======= b",
+            "replace": "val same = a == b"
+        }]
+
 
 class TestSearchReplacePatchApplication:
     """Test search-replace patch application functionality"""
@@ -191,7 +219,7 @@ class TestSearchReplacePatchApplication:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_exact_match(self):
         """Test applying patch with exact content match"""
         workspace_name = self._get_unique_workspace_name("test-workspace")
@@ -227,7 +255,7 @@ def newFunction(): String = "updated"
         assert 'def newFunction(): String = "updated"' in updated_content["content"]
         assert 'def oldFunction()' not in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_fuzzy_match(self):
         """Test applying patch with fuzzy matching when exact match fails"""
         workspace_name = "test-workspace"
@@ -258,7 +286,7 @@ def newFunction(): String = "updated"
         assert result["patch_applied"] is True
         assert result["results"]["successful_files"] == 1
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_multiple_files(self):
         """Test applying patch to multiple files"""
         workspace_name = "test-workspace"
@@ -302,7 +330,34 @@ def func2() = "new2"
         assert '"new1"' in file1_updated["content"]
         assert '"new2"' in file2_updated["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_apply_patch_indexes_each_file_once(self):
+        """Test several hunks on one file re-index it once, with its final content"""
+        workspace_name = self._get_unique_workspace_name("test-workspace")
+        await self.workspace_manager.create_workspace(workspace_name)
+        await self.workspace_manager.create_file(workspace_name, "Twice.scala", 'val a = "old"\nval b = "old"')
+
+        patch_content = """Twice.scala
+<<<<<<< SEARCH
+val a = "old"
+=======
+val a = "new"
+>>>>>>> REPLACE
+
+Twice.scala
+<<<<<<< SEARCH
+val b = "old"
+=======
+val b = "new"
+>>>>>>> REPLACE"""
+
+        with patch.object(self.workspace_manager, "_index_file", AsyncMock()) as index_file:
+            result = await self.workspace_manager.apply_patch(workspace_name, patch_content)
+
+        assert result["results"]["successful_files"] == 2
+        index_file.assert_awaited_once_with(workspace_name, "Twice.scala", 'val a = "new"\nval b = "new"')
+
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_create_new_file(self):
         """Test applying patch to create new file"""
         workspace_name = "test-workspace"
@@ -328,7 +383,7 @@ object NewFile {
         file_content = await self.workspace_manager.get_file_content(workspace_name, "src/main/scala/NewFile.scala")
         assert "New file created" in file_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_search_not_found(self):
         """Test applying patch when search content is not found"""
         workspace_name = "test-workspace"
@@ -358,7 +413,7 @@ def newFunction() = "replacement"
         assert result["results"]["modified_files"][0]["status"] == "failed"
         assert "not found" in result["results"]["modified_files"][0]["error"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_nonexistent_workspace(self):
         """Test applying patch to non-existent workspace"""
         patch_content = """Test.scala
@@ -466,6 +521,49 @@ sum
         assert result["found"] is True
         assert "Simplified addition" in result["content"]
 
+    @pytest.mark.parametrize("content,search_content,replace_content,expected", [
+        pytest.param(
+            "def calculateSum(a: Int, b: Int): Int = {\n  val result = a + b\n  return result\n}",
+            "def calculateSum(a:Int,b:Int):Int={\nval result=a+b\nreturn result\n}",
+            "def calculateSum(a: Int, b: Int): Int = a + b",
+            "def calculateSum(a: Int, b: Int): Int = a + b",
+            id="reformatted",
+        ),
+        pytest.param(
+            "object A {\n  val timeout = 30\n  val retries = 3\n}",
+            "  val timeuot = 30\n  val retries = 3",
+            "  val timeout = 60\n  val retries = 5",
+            "val timeout = 60",
+            id="typo",
+        ),
+        pytest.param(
+            "def calculateSum(a: Int, b: Int): Int = {\n  val result = a + b\n  return result\n}",
+            "def completely_different_function(): String = {\n  return \"different\"\n}",
+            "replacement",
+            None,
+            id="unrelated",
+        ),
+        pytest.param(
+            "val x = 1\nval y = 2",
+            "val x = 1\nval y = 2\nval z = 3\nval w = 4\nval v = 5",
+            "replacement",
+            None,
+            id="length_bound",
+        ),
+    ])
+    def test_fuzzy_replace_on_each_backend(self, similarity_backend, content, search_content,
+                                           replace_content, expected):
+        """Test fuzzy replacement gives the same outcome with rapidfuzz and with difflib"""
+        result = self.workspace_manager._fuzzy_replace(content, search_content, replace_content)
+        
+        if expected is None:
+            assert result["found"] is False
+            assert result["content"] == content
+        else:
+            assert result["found"] is True
+            assert result["match_ratio"] >= 0.7
+            assert expected in result["content"]
+
 
 class TestRealWhooshFuzzySearch:
     """Test fuzzy search functionality with real Whoosh integration"""
@@ -484,7 +582,7 @@ class TestRealWhooshFuzzySearch:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_fuzzy_search_with_real_index(self):
         """Test fuzzy search with actual Whoosh index and files"""
         workspace_name = "fuzzy-test-workspace"
@@ -546,7 +644,7 @@ class TestRealWhooshFuzzySearch:
             assert any("Calculator.scala" in result["filepath"] for result in fuzzy_results)
             assert all(result["fuzzy_search"] is True for result in fuzzy_results)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_fuzzy_search_with_multiple_terms(self):
         """Test fuzzy search with multiple search terms"""
         workspace_name = "multi-term-test"
@@ -591,7 +689,7 @@ class TestRealWhooshFuzzySearch:
         assert any("UserService.scala" in result["filepath"] for result in fuzzy_results)
         assert all(result["fuzzy_search"] is True for result in fuzzy_results)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_fuzzy_search_fallback_to_regular(self):
         """Test that fuzzy search falls back to regular search on complex errors"""
         workspace_name = "fallback-test"
@@ -614,7 +712,7 @@ class TestRealWhooshFuzzySearch:
         # Should still return results via fallback
         assert isinstance(results, list)  # Should not crash
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_regular_search_vs_fuzzy_search(self):
         """Test comparing regular search with fuzzy search results"""
         workspace_name = "comparison-test"
@@ -682,7 +780,7 @@ class TestEdgeCasesAndErrorHandling:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_empty_patch(self):
         """Test applying empty patch content"""
         workspace_name = "test-workspace"
@@ -693,7 +791,7 @@ class TestEdgeCasesAndErrorHandling:
         assert result["patch_applied"] is False
         assert result["results"]["total_files"] == 0
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_unicode_content(self):
         """Test applying patch with Unicode characters"""
         workspace_name = "test-workspace"
@@ -725,7 +823,7 @@ val message = "Hola 🌍"
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "Hola 🌍" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_deeply_nested_directories(self):
         """Test applying patch to files in deeply nested directories"""
         workspace_name = "test-workspace"
@@ -766,7 +864,7 @@ val path = "/home/user/test"
         assert '\\d+\\s*\\w+' in patches[0]["search"]
         assert '/home/user/test' in patches[0]["replace"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_same_search_replace(self):
         """Test applying patch where search and replace content are identical"""
         workspace_name = "test-workspace"
@@ -792,7 +890,7 @@ def func() = "same"
         # Should still succeed even though content is identical
         assert result["patch_applied"] is True
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_ignoring_spaces(self):
         """Test applying patch with space-insensitive matching"""
         workspace_name = "test-workspace"
@@ -833,7 +931,7 @@ val deepInner = {
         assert "modified deep value" in updated_content["content"]
         assert "very deep value" not in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_different_indentation(self):
         """Test applying patch with different indentation levels"""
         workspace_name = "test-workspace"
@@ -878,7 +976,7 @@ result
         assert "val result = 1 + 2" in updated_content["content"]
         assert "val x = 1" not in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_extra_spaces(self):
         """Test applying patch with extra spaces in search content"""
         workspace_name = "test-workspace"
@@ -912,7 +1010,7 @@ def multiply(a: Int, b: Int): Int = a * b
         assert "def multiply(a: Int, b: Int): Int = a * b" in updated_content["content"]
         assert "def calculate" not in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_preserves_indentation(self):
         """Test that patch application preserves the original indentation"""
         workspace_name = "test-workspace"
@@ -970,7 +1068,7 @@ product
         else:
             assert False, "multiply function not found in updated content"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_preserves_complex_indentation(self):
         """Test that patch application preserves complex nested indentation"""
         workspace_name = "test-workspace"
@@ -1037,7 +1135,7 @@ tripled
         else:
             assert False, "map function not found in updated content"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_extra_lines_follow_last_line_indent(self):
         """Test that extra lines in replacement follow the indentation of the last line from search"""
         workspace_name = "test-workspace"
@@ -1092,7 +1190,7 @@ tripled + quadrupled
         else:
             assert False, "doubled variable not found in updated content"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_fewer_lines_than_search(self):
         """Test that replacement with fewer lines than search works correctly"""
         workspace_name = "test-workspace"
@@ -1152,7 +1250,7 @@ data.trim().toUpperCase().replace(" ", "_") + "_PROCESSED"
         else:
             assert False, "Replacement line not found"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_deletion_with_empty_replacement(self):
         """Test that multiple lines can be deleted with empty replacement"""
         workspace_name = "test-workspace"
@@ -1241,7 +1339,7 @@ class TestIntegrationScenarios:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_refactoring_scenario_rename_class(self):
         """Test real-world refactoring scenario: rename class"""
         workspace_name = "test-workspace"
@@ -1350,7 +1448,7 @@ class AccountServiceTest extends AnyFlatSpec {
         assert "class AccountServiceTest" in test_content["content"]
         assert "new AccountService()" in test_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_configuration_update_scenario(self):
         """Test real-world scenario: update configuration values"""
         workspace_name = "test-workspace"
@@ -1423,7 +1521,7 @@ class AccountServiceTest extends AnyFlatSpec {
         assert 'host = "0.0.0.0"' in config_text
         assert 'maxConnections = 50' in config_text
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_build_file_update_scenario(self):
         """Test real-world scenario: update build file dependencies"""
         workspace_name = "test-workspace"
@@ -1504,7 +1602,7 @@ class TestSpecialFileTypes:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_json_file(self):
         """Test applying patch to JSON file"""
         workspace_name = "test-workspace"
@@ -1558,7 +1656,7 @@ class TestSpecialFileTypes:
         assert '"version": "1.1.0"' in json_text
         assert '"feature3"' in json_text
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_yaml_file(self):
         """Test applying patch to YAML file"""
         workspace_name = "test-workspace"
@@ -1609,7 +1707,7 @@ database:
         assert "version: 1.2.0" in yaml_text
         assert "- feature3" in yaml_text
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_xml_file(self):
         """Test applying patch to XML file"""
         workspace_name = "test-workspace"
@@ -1664,7 +1762,7 @@ database:
         assert "<version>1.3.0</version>" in xml_text
         assert "<feature>feature3</feature>" in xml_text
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_to_markdown_file(self):
         """Test applying patch to markdown file"""
         workspace_name = "markdown-test"
@@ -1737,7 +1835,7 @@ class TestAdvancedEdgeCases:
         """Generate unique workspace name for test isolation"""
         return f"{base_name}-{self.test_id}"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_circular_replacement(self):
         """Test applying patch that creates circular replacement pattern"""
         workspace_name = "circular-test"
@@ -1782,7 +1880,7 @@ def b = "A"
         assert 'def a = "B"' in content
         assert 'def b = "A"' in content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_nested_search_replace_markers(self):
         """Test applying patch with nested search/replace markers in content"""
         workspace_name = "nested-markers-test"
@@ -1823,7 +1921,7 @@ val comment = \"\"\"
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "processed markers" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_very_deep_nesting(self):
         """Test applying patch with very deeply nested code structure"""
         workspace_name = "deep-nesting-test"
@@ -1886,7 +1984,7 @@ def level10() = {{
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "modified deep" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_exact_threshold_fuzzy_match(self):
         """Test fuzzy matching at exact similarity threshold"""
         workspace_name = "threshold-test"
@@ -1937,7 +2035,7 @@ def calculate(x: Int, y: Int, z: Int): Int = {{
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "<<" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_file_ends_with_search_content(self):
         """Test applying patch where search content is at the very end of file"""
         workspace_name = "end-search-test"
@@ -1969,7 +2067,7 @@ def end() = "modified"
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert 'def end() = "modified"' in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_file_starts_with_search_content(self):
         """Test applying patch where search content is at the very start of file"""
         workspace_name = "start-search-test"
@@ -1999,7 +2097,7 @@ object Modified {{
         updated_content = await self.workspace_manager.get_file_content(workspace_name, file_path)
         assert "object Modified" in updated_content["content"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_with_search_content_spans_entire_file(self):
         """Test applying patch where search content spans the entire file"""
         workspace_name = "entire-file-test"
@@ -55,7 +55,7 @@ class TestWorkspaceManager:
         assert wm.workspaces_dir.exists()
         assert wm.index_dir.exists()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_create_workspace_success(self, workspace_manager):
         """Test successful workspace creation"""
         workspace_name = "test-workspace"
@@ -73,13 +73,13 @@ class TestWorkspaceManager:
         assert (workspace_path / "src" / "test" / "scala").exists()
         assert (workspace_path / "project").exists()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_create_workspace_invalid_name(self, workspace_manager):
         """Test workspace creation with invalid name"""
         with pytest.raises(ValueError, match="Invalid workspace name"):
             await workspace_manager.create_workspace("invalid/name")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_create_workspace_already_exists(self, workspace_manager):
         """Test workspace creation when workspace already exists"""
         workspace_name = "test-workspace"
@@ -104,7 +104,7 @@ class TestWorkspaceManager:
         assert workspaces[0]["name"] == "test-workspace"
         assert workspaces[0]["files_count"] == 1
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_delete_workspace(self, workspace_manager):
         """Test workspace deletion"""
         workspace_name = "test-workspace"
@@ -116,13 +116,13 @@ class TestWorkspaceManager:
         assert result["deleted"] is True
         assert not workspace_manager.get_workspace_path(workspace_name).exists()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_delete_nonexistent_workspace(self, workspace_manager):
         """Test deleting a workspace that doesn't exist"""
         with pytest.raises(ValueError, match="not found"):
             await workspace_manager.delete_workspace("nonexistent")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_get_file_tree(self, workspace_manager):
         """Test getting file tree structure"""
         workspace_name = "test-workspace"
@@ -135,7 +135,7 @@ class TestWorkspaceManager:
         assert result["tree"]["type"] == "directory"
         assert "children" in result["tree"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_create_file(self, workspace_manager):
         """Test file creation"""
         workspace_name = "test-workspace"
@@ -155,7 +155,7 @@ class TestWorkspaceManager:
         assert full_path.exists()
         assert full_path.read_text() == content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_update_file(self, workspace_manager):
         """Test file update"""
         workspace_name = "test-workspace"
@@ -178,7 +178,34 @@ class TestWorkspaceManager:
         assert result["updated"] is True
         assert full_path.read_text() == updated_content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_files(self, workspace_manager):
+        """Test batch file upsert"""
+        workspace_name = "test-workspace"
+        await workspace_manager.create_workspace(workspace_name)
+        
+        result = await workspace_manager.update_files(workspace_name, [
+            {"file_path": "src/main/scala/Main.scala", "content": "object Main"},
+            {"file_path": "README.md", "content": "# Readme"},
+            {"file_path": "src", "content": "not a file"},
+        ])
+        
+        assert result["total_files"] == 3
+        assert result["successful_files"] == 2
+        assert [f["status"] for f in result["files"]] == ["success", "success", "error"]
+        assert result["files"][0]["updated"] is True  # overwrote the default Main.scala
+        assert result["files"][1]["created"] is True
+        
+        workspace_path = workspace_manager.get_workspace_path(workspace_name)
+        assert (workspace_path / "README.md").read_text() == "# Readme"
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_update_files_workspace_not_found(self, workspace_manager):
+        """Test batch file upsert on a missing workspace"""
+        with pytest.raises(ValueError, match="not found"):
+            await workspace_manager.update_files("nonexistent", [{"file_path": "a.txt", "content": ""}])
+
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_delete_file(self, workspace_manager):
         """Test file deletion"""
         workspace_name = "test-workspace"
@@ -195,7 +222,7 @@ class TestWorkspaceManager:
         assert result["deleted"] is True
         assert not full_path.exists()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_get_file_content(self, workspace_manager):
         """Test getting file content"""
         workspace_name = "test-workspace"
@@ -261,7 +288,7 @@ class TestWorkspaceManager:
         assert not workspace_manager._is_safe_file_path("")
         assert not workspace_manager._is_safe_file_path("a" * 501)  # Too long
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_get_file_tree_filtering(self, workspace_manager):
         """Test file tree filtering functionality"""
         workspace_name = "test-workspace-filtering"
@@ -339,7 +366,7 @@ class TestWorkspaceManager:
 class TestGitOperations:
     """Test suite for Git operations"""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_clone_workspace_from_git_success(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test successful Git repository cloning"""
@@ -361,19 +388,19 @@ class TestGitOperations:
         mock_repo_class.clone_from.assert_called_once_with(git_url, workspace_manager.get_workspace_path(workspace_name), branch=branch)
         mock_index.assert_called_once_with(workspace_name)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_clone_workspace_invalid_name(self, workspace_manager):
         """Test Git cloning with invalid workspace name"""
         with pytest.raises(ValueError, match="Invalid workspace name"):
             await workspace_manager.clone_workspace_from_git("invalid/name", "https://github.com/user/repo.git")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_clone_workspace_invalid_url(self, workspace_manager):
         """Test Git cloning with invalid URL"""
         with pytest.raises(ValueError, match="Invalid Git URL"):
             await workspace_manager.clone_workspace_from_git("valid-name", "invalid-url")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_checkout_branch_create_new(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test creating and checking out a new branch"""
@@ -397,7 +424,7 @@ class TestGitOperations:
         mock_git_repo.create_head.assert_called_once_with(branch_name)
         mock_new_branch.checkout.assert_called_once()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_checkout_existing_branch(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test checking out an existing branch"""
@@ -418,7 +445,7 @@ class TestGitOperations:
         
         mock_git_repo.git.checkout.assert_called_once_with(branch_name)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_add_files_specific(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test adding specific files to Git staging"""
@@ -438,7 +465,7 @@ class TestGitOperations:
         
         mock_git_repo.index.add.assert_called_once_with(file_paths)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_add_all_files(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test adding all files to Git staging"""
@@ -457,7 +484,7 @@ class TestGitOperations:
         
         mock_git_repo.git.add.assert_called_once_with('.')
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_commit(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test Git commit"""
@@ -485,7 +512,7 @@ class TestGitOperations:
         
         mock_git_repo.index.commit.assert_called_once()
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_push(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test Git push"""
@@ -512,7 +539,7 @@ class TestGitOperations:
         mock_git_repo.remote.assert_called_once_with(remote_name)
         mock_remote.push.assert_called_once_with(f"{branch_name}:{branch_name}")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_pull(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test Git pull"""
@@ -541,7 +568,7 @@ class TestGitOperations:
         mock_git_repo.remote.assert_called_once_with(remote_name)
         mock_remote.pull.assert_called_once_with(branch_name)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_status(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test Git status"""
@@ -568,7 +595,7 @@ class TestGitOperations:
         assert "new-file.scala" in result["untracked_files"]
         assert "modified-file.scala" in result["modified_files"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_git_log(self, mock_repo_class, workspace_manager, mock_git_repo):
         """Test Git commit history"""
@@ -600,7 +627,7 @@ class TestGitOperations:
         
         mock_git_repo.iter_commits.assert_called_once_with(max_count=limit)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_git_operations_invalid_workspace(self, workspace_manager):
         """Test Git operations on non-existent workspace"""
         workspace_name = "nonexistent-workspace"
@@ -626,7 +653,7 @@ class TestGitOperations:
         with pytest.raises(ValueError, match="not found"):
             await workspace_manager.git_log(workspace_name)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_git_operations_invalid_branch_name(self, workspace_manager):
         """Test Git operations with invalid branch names"""
         workspace_name = "test-workspace"
@@ -636,7 +663,7 @@ class TestGitOperations:
         with pytest.raises(ValueError, match="Invalid branch name"):
             await workspace_manager.git_checkout_branch(workspace_name, "invalid~branch")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_git_commit_empty_message(self, workspace_manager):
         """Test Git commit with empty message"""
         workspace_name = "test-workspace"
@@ -646,7 +673,7 @@ class TestGitOperations:
         with pytest.raises(ValueError, match="Commit message cannot be empty"):
             await workspace_manager.git_commit(workspace_name, "")
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_git_add_invalid_file_path(self, workspace_manager):
         """Test Git add with invalid file paths"""
         workspace_name = "test-workspace"
@@ -664,7 +691,7 @@ class TestGitOperations:
 class TestSearchOperations:
     """Test suite for search operations"""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_search_files(self, workspace_manager):
         """Test file search functionality using real Whoosh index"""
         workspace_name = "test-workspace"
@@ -699,7 +726,7 @@ class TestSearchOperations:
         # Clean up
         await workspace_manager.delete_workspace(workspace_name)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_index_all_files_in_workspace(self, workspace_manager):
         """Test indexing all files in a workspace"""
         workspace_name = "test-workspace"
@@ -733,7 +760,7 @@ class TestSearchOperations:
         binary_result = await workspace_manager.search_files(workspace_name, "binary content", limit=10)
         assert len(binary_result) == 0  # Binary content shouldn't be indexed
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.open_dir')
     async def test_count_indexed_files(self, mock_open_index, workspace_manager):
         """Test counting indexed files"""
@@ -752,7 +779,7 @@ class TestSearchOperations:
         
         assert count == 3
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     @patch('scala_runner.workspace_manager.git.Repo')
     async def test_get_workspace_git_info_success(self, mock_repo_class, workspace_manager):
         """Test getting Git info for a workspace"""
@@ -794,7 +821,7 @@ class TestSearchOperations:
         assert result["remotes"][0]["name"] == "origin"
         assert len(result["branches"]) == 1
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_get_workspace_git_info_not_git_repo(self, workspace_manager):
         """Test getting Git info for non-Git workspace"""
         workspace_name = "test-workspace"
@@ -813,7 +840,7 @@ class TestSearchOperations:
 class TestPatchOperations:
     """Test git diff patch functionality"""
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_simple_line_change(self, workspace_manager):
         """Test applying a simple patch that changes one line"""
         workspace_name = "test-workspace"
@@ -858,7 +885,7 @@ class TestPatchOperations:
         assert "Hello, Patched!" in new_content
         assert "Hello, World!" not in new_content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_add_new_lines(self, workspace_manager):
         """Test applying a patch that adds new lines"""
         workspace_name = "test-workspace"
@@ -902,7 +929,7 @@ class TestPatchOperations:
         assert "val x = 42" in new_content
         assert "println(s\"Number: $x\")" in new_content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_remove_lines(self, workspace_manager):
         """Test applying a patch that removes lines"""
         workspace_name = "test-workspace"
@@ -950,7 +977,7 @@ class TestPatchOperations:
         assert "println(\"Hello\")" in new_content
         assert "println(\"Goodbye\")" in new_content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_create_new_file(self, workspace_manager):
         """Test applying a patch that creates a new file"""
         workspace_name = "test-workspace"
@@ -983,7 +1010,7 @@ object NewFile {
         assert "object NewFile" in content
         assert "Hello from new file!" in content
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_multiple_files(self, workspace_manager):
         """Test applying a patch that modifies multiple files"""
         workspace_name = "test-workspace"
@@ -1039,7 +1066,7 @@ object File2 {{
         assert 'val value = "old"' not in content1
         assert 'println("updated")' in content2
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_invalid_workspace(self, workspace_manager):
         """Test applying patch to non-existent workspace"""
         patch_content = """test.scala
@@ -1052,7 +1079,7 @@ new line
         with pytest.raises(ValueError, match="Workspace 'nonexistent' not found"):
             await workspace_manager.apply_patch("nonexistent", patch_content)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_empty_patch(self, workspace_manager):
         """Test applying empty patch"""
         workspace_name = "test-workspace"
@@ -1069,7 +1096,7 @@ new line
         assert result["results"]["total_files"] == 0
         assert result["results"]["successful_files"] == 0
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_file_permission_error(self, workspace_manager):
         """Test applying patch when file operations fail"""
         workspace_name = "test-workspace"
@@ -1097,7 +1124,7 @@ test content
             assert modified_file["status"] == "failed"
             assert "error" in modified_file
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_apply_patch_create_nested_directories(self, workspace_manager):
         """Test creating files in nested directories that don't exist"""
         workspace_name = "test-workspace"